@@ -59,7 +59,8 @@ class WrapCore(wiring.Component):
 
     A FIFO of size ``max_latency`` is used to track and propagate ``payload.first`` from
     the input to the output of the wrapped core. The wrapped core must never store more
-    than ``max_latency`` elements in flight for this to work correctly.
+    than ``max_latency`` elements in flight for this to work correctly. For cores with
+    only a few elements in flight, ``shift_register`` replaces the FIFO with a few flops.
 
     Members
     -------
@@ -69,18 +70,24 @@ class WrapCore(wiring.Component):
         Outgoing blocks, where shape of block payload is inherited from the wrapped core.
     """
 
-    def __init__(self, core, max_latency=16):
+    def __init__(self, core, max_latency=16, shift_register=False):
         """
         core : wiring.Component
             DSP core to be wrapped. ``shape_i`` and ``shape_o`` come from
             ``i.payload.shape()`` and ``o.payload.shape()``.
         max_latency : int
             Maximum amount of elements that may be in-flight inside the wrapped core.
+        shift_register : bool
+            Keep ``payload.first`` flags in a ``max_latency`` bit shift register
+            (indexed by the number of elements in flight) rather than a FIFO.
+            No memory or FIFO pointers are needed, which is cheapest for small
+            ``max_latency``, e.g. cores that only process 1 element at a time.
         """
         self.core = core
         self.shape_i = core.i.payload.shape()
         self.shape_o = core.o.payload.shape()
         self.max_latency = max_latency
+        self.shift_register = shift_register
         super().__init__({
             "i": In(stream.Signature(Block(self.shape_i))),
             "o": Out(stream.Signature(Block(self.shape_o))),
@@ -91,34 +98,55 @@ class WrapCore(wiring.Component):
 
         m.submodules.dsp_core = dsp_core = self.core
 
-        # FIFO to preserve the 'first' signal
-        m.submodules.first_fifo = first_fifo = fifo.SyncFIFOBuffered(
-            width=1, depth=self.max_latency
-        )
+        w_en = Signal()
+        r_en = Signal()
+
+        if self.shift_register:
+            # Shift register to preserve the 'first' signal. The newest flag
+            # is shifted in at bit 0, so the oldest flag still in flight is
+            # always at bit 'level - 1'.
+            first_sr = Signal(self.max_latency)
+            level = Signal(range(self.max_latency + 1))
+            w_rdy = level != self.max_latency
+            r_rdy = level != 0
+            r_data = first_sr.bit_select((level - 1).as_unsigned(), 1)
+            with m.If(w_en):
+                m.d.sync += first_sr.eq(Cat(self.i.payload.first, first_sr[:-1]))
+            m.d.sync += level.eq(level + w_en - r_en)
+        else:
+            # FIFO to preserve the 'first' signal
+            m.submodules.first_fifo = first_fifo = fifo.SyncFIFOBuffered(
+                width=1, depth=self.max_latency
+            )
+            w_rdy = first_fifo.w_rdy
+            r_rdy = first_fifo.r_rdy
+            r_data = first_fifo.r_data
+            m.d.comb += [
+                first_fifo.w_en.eq(w_en),
+                first_fifo.w_data.eq(self.i.payload.first),
+                first_fifo.r_en.eq(r_en),
+            ]
 
         sample_in = stream.Signature(self.shape_i).create()
         m.d.comb += [
             sample_in.valid.eq(self.i.valid),
             sample_in.payload.eq(self.i.payload.sample),
-            self.i.ready.eq(sample_in.ready & first_fifo.w_rdy),
+            self.i.ready.eq(sample_in.ready & w_rdy),
         ]
         wiring.connect(m, sample_in, dsp_core.i)
 
-        # Store 'first' signal in FIFO whenever a sample is transferred
-        m.d.comb += [
-            first_fifo.w_en.eq(self.i.valid & self.i.ready),
-            first_fifo.w_data.eq(self.i.payload.first),
-        ]
+        # Store 'first' signal whenever a sample is transferred
+        m.d.comb += w_en.eq(self.i.valid & self.i.ready)
 
         sample_out = stream.Signature(self.shape_o).flip().create()
         wiring.connect(m, dsp_core.o, sample_out)
 
         m.d.comb += [
-            self.o.valid.eq(sample_out.valid & first_fifo.r_rdy),
+            self.o.valid.eq(sample_out.valid & r_rdy),
             self.o.payload.sample.eq(sample_out.payload),
-            self.o.payload.first.eq(first_fifo.r_data),
-            sample_out.ready.eq(self.o.ready & first_fifo.r_rdy),
-            first_fifo.r_en.eq(self.o.valid & self.o.ready),
+            self.o.payload.first.eq(r_data),
+            sample_out.ready.eq(self.o.ready & r_rdy),
+            r_en.eq(self.o.valid & self.o.ready),
         ]
 
         return m
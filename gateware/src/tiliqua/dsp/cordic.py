@@ -8,12 +8,13 @@
 from math import atan, pi
 
 from amaranth import *
-from amaranth.lib import memory, stream, wiring
+from amaranth.lib import stream, wiring
 from amaranth.lib.wiring import In, Out
 
 from amaranth_future import fixed
 
 from .complex import CQ, Polar
+from .misc import naf
 
 
 class RectToPolarCordic(wiring.Component):
@@ -34,6 +35,13 @@ class RectToPolarCordic(wiring.Component):
 
         S: =1 if 'magnitude_correction' is True, and =K (CORDIC gain) otherwise
 
+    Magnitude correction is implemented with shifts and adds, without a multiplier.
+
+    By default, a single shift/add datapath is shared by all iterations, such
+    that 1 sample is processed every ``iterations+3`` cycles. If ``pipelined``
+    is set, each iteration gets its own datapath and pipeline stage instead,
+    such that 1 sample is processed every cycle.
+
     Members
     -------
     i : :py:`In(stream.Signature(CQ(shape)))`
@@ -46,7 +54,7 @@ class RectToPolarCordic(wiring.Component):
     K = 1.646760258121
 
     def __init__(self, shape: fixed.Shape, iterations: int = None,
-                 magnitude_correction=True):
+                 magnitude_correction=True, pipelined=False):
         """
         shape : Shape
             Shape of fixed-point number to use for incoming :class:`CQ` stream.
@@ -55,38 +63,57 @@ class RectToPolarCordic(wiring.Component):
             requires more clock cycles. This defaults to the number of bits
             in the provided ``shape``.
         magnitude_correction : bool
-            Whether to consume an additional multiplier to correct for the CORDIC gain
-            constant. For some applications, this is not needed and can be used to
-            save a multiplier.
+            Whether to correct for the CORDIC gain constant. For some applications,
+            this is not needed and can be used to save a few adders.
+        pipelined : bool
+            Unroll all iterations into a pipeline with 1 sample/cycle throughput
+            and ``iterations+1`` cycles latency, at the cost of ``iterations``
+            times the adders and registers.
         """
 
         self.shape = shape
         self.iterations = iterations or shape.i_bits + shape.f_bits
         self.internal_shape = fixed.SQ(self.shape.i_bits + 2, self.shape.f_bits)
         self.magnitude_correction = magnitude_correction
+        self.pipelined = pipelined
 
         super().__init__({
             "i": In(stream.Signature(CQ(shape))),
             "o": Out(stream.Signature(Polar(self.internal_shape))),
         })
 
+    def _atan_consts(self):
+        """Arctangent (in units of pi) rotated by each iteration."""
+        return [fixed.Const(atan(1.0 / (1<<i)) / pi, self.internal_shape)
+                for i in range(self.iterations)]
+
+    def _inv_gain(self, x):
+        """
+        :py:`x * 1/K` (with :py:`1/K` quantized to :py:`internal_shape`),
+        as a sum of shifted copies of :py:`x` given by the canonical signed
+        digits of :py:`1/K`. Results are identical to a multiplier.
+        """
+        f_bits = self.internal_shape.f_bits
+        c = fixed.Const(1.0/self.K, self.internal_shape).as_integer_ratio()[0]
+        terms = [
+            -(x.as_value() << p) if d < 0 else x.as_value() << p
+            for p, d in enumerate(naf(c)) if d
+        ]
+        return fixed.Value.cast(sum(terms[1:], terms[0]), x.shape().f_bits + f_bits)
+
     def elaborate(self, platform) -> Module:
         m = Module()
 
+        if self.pipelined:
+            return self.elaborate_pipelined(m)
+
         #
-        # Arctangent ROM initialization
+        # Arctangent table. This is small enough that it is simply
+        # a mux of constants, rather than a ROM.
         #
 
-        atan_values = []
-        for i in range(self.iterations):
-            angle = atan(1.0 / (1<<i)) / pi
-            atan_values.append(angle)
-        m.submodules.atan_rom = atan_rom = memory.Memory(
-            shape=self.internal_shape,
-            depth=self.iterations,
-            init=atan_values
-        )
-        atan_rd = atan_rom.read_port(domain='comb')
+        atan_table = Array(c.as_value() for c in self._atan_consts())
+        atan_d = Signal(self.internal_shape)
 
         #
         # State and iteration registers
@@ -106,7 +133,7 @@ class RectToPolarCordic(wiring.Component):
         y_shift = Signal(self.internal_shape)
         d = Signal()
         m.d.comb += [
-            atan_rd.addr.eq(iteration),
+            atan_d.as_value().eq(atan_table[iteration]),
             # Shifted values for current iteration
             x_shift.eq(x >> iteration),
             y_shift.eq(y >> iteration),
@@ -121,9 +148,10 @@ class RectToPolarCordic(wiring.Component):
         quadrant_adjust = Signal(self.internal_shape)
         m.d.comb += self.o.payload.phase.eq(z + quadrant_adjust),
         if self.magnitude_correction:
-            # Scale magnitude by 1/K to compensate for CORDIC gain
-            m.d.comb += self.o.payload.magnitude.eq(
-                x * fixed.Const(1.0/self.K, self.internal_shape))
+            # Registered after the last iteration (see below), such that
+            # the gain correction adders are not on the output path.
+            magnitude = Signal(self.internal_shape)
+            m.d.comb += self.o.payload.magnitude.eq(magnitude)
         else:
             m.d.comb += self.o.payload.magnitude.eq(x)
 
@@ -170,17 +198,20 @@ class RectToPolarCordic(wiring.Component):
                         m.d.sync += [
                             x.eq(x - y_shift),
                             y.eq(y + x_shift),
-                            z.eq(z - atan_rd.data),
+                            z.eq(z - atan_d),
                         ]
                     with m.Else():  # y < 0, rotate counter-clockwise
                         m.d.sync += [
                             x.eq(x + y_shift),
                             y.eq(y - x_shift),
-                            z.eq(z + atan_rd.data),
+                            z.eq(z + atan_d),
                         ]
                     m.d.sync += iteration.eq(iteration + 1)
                     m.next = "ITERATE"
                 with m.Else():
+                    if self.magnitude_correction:
+                        # Scale magnitude by 1/K to compensate for CORDIC gain
+                        m.d.sync += magnitude.eq(self._inv_gain(x))
                     m.next = "OUTPUT"
 
             with m.State("OUTPUT"):
@@ -189,3 +220,116 @@ class RectToPolarCordic(wiring.Component):
                     m.next = "IDLE"
 
         return m
+
+    def elaborate_pipelined(self, m):
+
+        #
+        # Pipeline registers. Stage 0 holds the quadrant-adjusted input,
+        # stage 'i+1' holds the result of iteration 'i'.
+        #
+        # There is no 'z' datapath. Instead, only the direction of each
+        # micro-rotation is kept (in 'sigma'), and the phase is summed from
+        # the corresponding arctangent constants after the last stage.
+        #
+
+        n_stages = self.iterations + 1
+        valid = Signal(n_stages)
+        x = [Signal(self.internal_shape, name=f"x{i}") for i in range(n_stages)]
+        y = [Signal(self.internal_shape, name=f"y{i}") for i in range(n_stages)]
+        sigma = [Signal(i, name=f"sigma{i}") for i in range(n_stages)]
+        quadrant_adjust = [Signal(self.internal_shape, name=f"quadrant_adjust{i}")
+                           for i in range(n_stages)]
+
+        # All stages advance together, unless the final stage is stalled.
+        ce = Signal()
+        m.d.comb += [
+            ce.eq(~valid[-1] | self.o.ready),
+            self.i.ready.eq(ce),
+        ]
+
+        #
+        # Determine which of 4 quadrants this is in
+        #
+
+        with m.If(ce):
+            m.d.sync += [
+                valid[0].eq(self.i.valid),
+                quadrant_adjust[0].eq(0),
+            ]
+            with m.If(self.i.payload.real >= 0):  # Q1, Q4
+                m.d.sync += [
+                    x[0].eq(self.i.payload.real),
+                    y[0].eq(self.i.payload.imag),
+                ]
+            with m.Else():
+                m.d.sync += [
+                    x[0].eq(-self.i.payload.real),
+                    y[0].eq(-self.i.payload.imag),
+                ]
+                with m.If(self.i.payload.imag >= 0):
+                    m.d.sync += quadrant_adjust[0].eq(fixed.Const(1.0))  # Q2
+                with m.Else():
+                    m.d.sync += quadrant_adjust[0].eq(fixed.Const(-1.0)) # Q3
+
+        #
+        # CORDIC rotation, 1 stage per iteration
+        #
+
+        atan_consts = self._atan_consts()
+
+        for i in range(self.iterations):
+            # Hardwired shift amount for this stage.
+            d = Signal(name=f"d{i}")
+            x_shift = Signal(self.internal_shape, name=f"x_shift{i}")
+            y_shift = Signal(self.internal_shape, name=f"y_shift{i}")
+            m.d.comb += [
+                x_shift.eq(x[i] >> i),
+                y_shift.eq(y[i] >> i),
+                d.eq((x[i]<0)^(y[i]<0)),
+            ]
+            with m.If(ce):
+                m.d.sync += [
+                    valid[i+1].eq(valid[i]),
+                    quadrant_adjust[i+1].eq(quadrant_adjust[i]),
+                    sigma[i+1].eq(Cat(sigma[i], d)),
+                ]
+                with m.If(d):  # y >= 0, rotate clockwise
+                    m.d.sync += [
+                        x[i+1].eq(x[i] - y_shift),
+                        y[i+1].eq(y[i] + x_shift),
+                    ]
+                with m.Else():  # y < 0, rotate counter-clockwise
+                    m.d.sync += [
+                        x[i+1].eq(x[i] + y_shift),
+                        y[i+1].eq(y[i] - x_shift),
+                    ]
+
+        #
+        # Phase from rotation directions: a balanced adder tree over
+        # the (signed) arctangent constants.
+        #
+
+        z = Signal(self.internal_shape)
+        terms = []
+        for i, c in enumerate(atan_consts):
+            c_raw = c.as_integer_ratio()[0]
+            terms.append(Mux(sigma[-1][i], -c_raw, c_raw))
+        while len(terms) > 1:
+            terms = [terms[k] + terms[k+1] for k in range(0, len(terms)-1, 2)] + terms[len(terms)-len(terms)%2:]
+        m.d.comb += z.as_value().eq(terms[0] if terms else 0)
+
+        #
+        # Output assignments
+        #
+
+        m.d.comb += [
+            self.o.valid.eq(valid[-1]),
+            self.o.payload.phase.eq(z + quadrant_adjust[-1]),
+        ]
+        if self.magnitude_correction:
+            # Scale magnitude by 1/K to compensate for CORDIC gain
+            m.d.comb += self.o.payload.magnitude.eq(self._inv_gain(x[-1]))
+        else:
+            m.d.comb += self.o.payload.magnitude.eq(x[-1])
+
+        return m
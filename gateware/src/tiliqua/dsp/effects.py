@@ -40,7 +40,8 @@ class WaveShaper(wiring.Component):
     i: In(stream.Signature(ASQ))
     o: Out(stream.Signature(ASQ))
 
-    def __init__(self, lut_function=None, lut_size=512, continuous=False, macp=None):
+    def __init__(self, lut_function=None, lut_size=512, continuous=False, macp=None,
+                 backend="mac"):
         """
         lut_function : function
             Function taking and emitting ``float`` values in a valid ``ASQ`` range.
@@ -52,11 +53,19 @@ class WaveShaper(wiring.Component):
             incoming saw results in a continuous output.
         macp : mac.MAC
             Optional shared MAC provider.
+        backend : str
+            ``"mac"`` (default) interpolates using the MAC provider. ``"booth"``
+            instead uses a dedicated radix-4 Booth shift-add multiplier, which
+            is only as wide as the fractional part of the LUT index (narrower
+            for larger ``lut_size``), and uses no hardware multipliers.
         """
+        assert backend in ["mac", "booth"]
+        assert backend == "mac" or macp is None
         self.lut_size = lut_size
         self.lut_addr_width = exact_log2(lut_size)
         self.continuous = continuous
-        self.macp = macp or mac.MAC.default()
+        self.backend = backend
+        self.macp = (macp or mac.MAC.default()) if backend == "mac" else None
 
         # build LUT such that we can index into it using 2s
         # complement and pluck out results with correct sign.
@@ -75,69 +84,77 @@ class WaveShaper(wiring.Component):
 
         super().__init__()
 
+    def _booth_multiply(self, a, b):
+        """
+        Exact product of signed :py:`a` and unsigned :py:`b` (raw values) as a
+        sum of radix-4 Booth partial products, one per 2 bits of :py:`b`.
+        """
+        bits = Cat(C(0, 1), b, C(0, 2))
+        terms = []
+        for j in range(len(b)//2 + 1):
+            # Digit in (-2, -1, 0, 1, 2) from bits 2j+1, 2j, 2j-1 of 'b'
+            pp = Array([0, a, a, a << 1, -(a << 1), -a, -a, 0])[bits[2*j:2*j+3]]
+            terms.append(pp << 2*j)
+        return sum(terms[1:], terms[0])
+
     def elaborate(self, platform):
         m = Module()
 
-        m.submodules.macp = mp = self.macp
+        if self.backend == "mac":
+            m.submodules.macp = mp = self.macp
 
         m.submodules.mem = mem = Memory(
             shape=ASQ, depth=self.lut_size, init=self.lut)
-        rport = mem.read_port()
+        # Both neighbouring LUT entries are read in the same cycle.
+        rport0 = mem.read_port()
+        rport1 = mem.read_port()
 
         ltype = fixed.SQ(self.lut_addr_width, ASQ.f_bits-self.lut_addr_width+1)
 
         x = Signal(ltype)
-        y = Signal(ASQ)
-        read0 = Signal(ASQ)
-        read1 = Signal(ASQ)
-
-        trunc = Signal()
+        x_next = Signal(ltype)
+        m.d.comb += x_next.eq(self.i.payload << (ltype.i_bits-1))
+
+        # Interpolation is computed as read0 + (read1 - read0)*frac, so
+        # only a single multiply is needed. Read ports hold their data
+        # until the next sample is accepted.
+        diff = Signal(fixed.SQ(2, ASQ.f_bits))
+        m.d.comb += diff.eq(rport1.data - rport0.data)
+
+        m.d.comb += rport0.addr.eq(x_next.truncate())
+        # is this a function where f(+1) ~= f(-1)
+        if self.continuous:
+            m.d.comb += rport1.addr.eq(x_next.truncate()+1)
+        else:
+            with m.If((x_next.truncate()).as_value() ==
+                      2**(self.lut_addr_width-1)-1):
+                m.d.comb += rport1.addr.eq(x_next.truncate())
+            with m.Else():
+                m.d.comb += rport1.addr.eq(x_next.truncate()+1)
 
         with m.FSM() as fsm:
 
             with m.State('WAIT-VALID'):
                 m.d.comb += self.i.ready.eq(1),
                 with m.If(self.i.valid):
-                    m.d.sync += x.eq(self.i.payload << (ltype.i_bits-1))
-                    m.d.sync += y.eq(0)
-                    m.next = 'ADDR0'
-
-            with m.State('ADDR0'):
-                m.d.comb += [
-                    rport.en.eq(1),
-                ]
-                # is this a function where f(+1) ~= f(-1)
-                if self.continuous:
-                    m.d.comb += rport.addr.eq(x.truncate()+1)
+                    m.d.comb += [
+                        rport0.en.eq(1),
+                        rport1.en.eq(1),
+                    ]
+                    m.d.sync += x.eq(x_next)
+                    m.next = 'MAC'
+
+            with m.State('MAC'):
+                if self.backend == "mac":
+                    with mp.Multiply(m, a=diff, b=x-x.truncate()):
+                        m.d.sync += self.o.payload.eq(rport0.data + mp.result.z)
+                        m.next = 'WAIT-READY'
                 else:
-                    with m.If((x.truncate()).as_value() ==
-                              2**(self.lut_addr_width-1)-1):
-                        m.d.comb += trunc.eq(1)
-                        m.d.comb += rport.addr.eq(x.truncate())
-                    with m.Else():
-                        m.d.comb += rport.addr.eq(x.truncate()+1)
-                m.next = 'READ0'
-
-            with m.State('READ0'):
-                m.d.sync += read0.eq(rport.data)
-                m.d.comb += [
-                    rport.addr.eq(x.truncate()),
-                    rport.en.eq(1),
-                ]
-                m.next = 'READ1'
-
-            with m.State('READ1'):
-                m.d.sync += read1.eq(rport.data)
-                m.next = 'MAC0'
-
-            with m.State('MAC0'):
-                with mp.Multiply(m, a=read0, b=x-x.truncate()):
-                    m.d.sync += y.eq(mp.result.z)
-                    m.next = 'MAC1'
-
-            with m.State('MAC1'):
-                with mp.Multiply(m, a=read1, b=(x.truncate()-x+1)):
-                    m.d.sync += self.o.payload.eq(y + mp.result.z)
+                    # The fractional part of 'x' is always positive.
+                    frac = (x - x.truncate()).as_value()[:ltype.f_bits]
+                    z = fixed.Value.cast(self._booth_multiply(diff.as_value(), frac),
+                                         diff.shape().f_bits + ltype.f_bits)
+                    m.d.sync += self.o.payload.eq(rport0.data + z)
                     m.next = 'WAIT-READY'
 
             with m.State('WAIT-READY'):
@@ -180,7 +197,7 @@ class PitchShift(wiring.Component):
         Output stream of pitch shifted samples.
     """
 
-    def __init__(self, tap, xfade=256, macp=None):
+    def __init__(self, tap, xfade=256, macp=None, tap1=None):
         """
         tap : delay_line.DelayLineTap()
             ``DelayLineTap`` which pitch shifter reads at 2 tap positions for every
@@ -191,9 +208,15 @@ class PitchShift(wiring.Component):
             Longer crossfades and grain sizes produce less 'fluttering'.
         macp : mac.MAC
             Optional shared MAC provider.
+        tap1 : delay_line.DelayLineTap()
+            Optional second ``DelayLineTap`` on the same delay line. If provided,
+            both tap positions are requested at the same time rather than one
+            after the other.
         """
         assert xfade <= (tap.max_delay // 4)
+        assert tap1 is None or tap1.max_delay == tap.max_delay
         self.tap        = tap
+        self.tap1       = tap1
         self.xfade      = xfade
         self.xfade_bits = exact_log2(xfade)
         # delay type: integer component is index into delay line
@@ -219,12 +242,17 @@ class PitchShift(wiring.Component):
         # Last samples from delay lines
         sample0 = Signal(ASQ)
         sample1 = Signal(ASQ)
-        # Envelope values
-        env0 = Signal(ASQ)
-        env1 = Signal(ASQ)
+        # Crossfade envelope of tap 0 (tap 1 takes the remainder). The output
+        # is computed as sample1 + (sample0 - sample1)*env, which only needs
+        # a single multiply.
+        env  = Signal(ASQ)
+        diff = Signal(fixed.SQ(2, ASQ.f_bits))
         output = Signal(ASQ)
 
-        s    = Signal(self.dtype)
+        # Next (unwrapped) delay position. This single adder is shared by the
+        # wrap tests and the update below. One bit wider than ``dtype`` so
+        # the wrap tests never see an overflowed sum.
+        s    = Signal(fixed.SQ(self.dtype.i_bits+1, self.dtype.f_bits))
         m.d.comb += s.eq(delay0 + self.i.payload.pitch)
 
         # Last latched grain size, pitch
@@ -233,62 +261,90 @@ class PitchShift(wiring.Component):
         # Second tap always uses second half of delay line.
         m.d.comb += delay1.eq(delay0 + grain_sz_latched)
 
+        # Outside the crossfade, the output is just tap 0, so the second
+        # tap read and the crossfade multiply are skipped entirely.
+        xfade = Signal()
+        m.d.comb += xfade.eq(delay0 < self.xfade)
+
         with m.FSM() as fsm:
             with m.State('WAIT-VALID'):
                 m.d.comb += self.i.ready.eq(1),
                 with m.If(self.i.valid):
-                    pitch    = self.i.payload.pitch
                     grain_sz = self.i.payload.grain_sz
                     m.d.sync += grain_sz_latched.eq(grain_sz)
-                    with m.If((delay0 + pitch) < fixed.Const(0, shape=self.dtype)):
-                        m.d.sync += delay0.eq(delay0 + grain_sz + pitch)
-                    with m.Elif((delay0 + pitch) > fixed.Value.cast(grain_sz)):
-                        m.d.sync += delay0.eq(delay0 + pitch - grain_sz)
+                    with m.If(s < fixed.Const(0, shape=self.dtype)):
+                        m.d.sync += delay0.eq(s + grain_sz)
+                    with m.Elif(s > fixed.Value.cast(grain_sz)):
+                        m.d.sync += delay0.eq(s - grain_sz)
                     with m.Else():
-                        m.d.sync += delay0.eq(delay0 + pitch)
+                        m.d.sync += delay0.eq(s)
                     m.next = 'TAP0'
-            with m.State('TAP0'):
-                m.d.comb += [
-                    self.tap.o.ready.eq(1),
-                    self.tap.i.valid.eq(1),
-                    self.tap.i.payload.eq(1+delay0.truncate() >> delay0.f_bits),
-                ]
-                with m.If(self.tap.o.valid):
-                    m.d.comb += self.tap.i.valid.eq(0),
-                    m.d.sync += sample0.eq(self.tap.o.payload)
-                    m.next = 'TAP1'
-            with m.State('TAP1'):
-                m.d.comb += [
-                    self.tap.o.ready.eq(1),
-                    self.tap.i.valid.eq(1),
-                    self.tap.i.payload.eq(delay1.truncate() >> delay1.f_bits),
-                ]
-                with m.If(self.tap.o.valid):
-                    m.d.comb += self.tap.i.valid.eq(0),
-                    m.d.sync += sample1.eq(self.tap.o.payload)
-                    m.next = 'ENV'
-            with m.State('ENV'):
-                with m.If(delay0 < self.xfade):
-                    # Map delay0 <= [0, xfade] to env0 <= [0, 1]
-                    m.d.sync += [
-                        env0.eq(delay0 >> self.xfade_bits),
-                        env1.eq(ASQ.max() -
-                                (delay0 >> self.xfade_bits)),
+            if self.tap1 is None:
+                with m.State('TAP0'):
+                    m.d.comb += [
+                        self.tap.o.ready.eq(1),
+                        self.tap.i.valid.eq(1),
+                        self.tap.i.payload.eq(1+delay0.truncate() >> delay0.f_bits),
                     ]
-                with m.Else():
-                    # If we're outside the xfade, just take tap 0
-                    m.d.sync += [
-                        env0.eq(ASQ.max()),
-                        env1.eq(0),
+                    with m.If(self.tap.o.valid):
+                        m.d.comb += self.tap.i.valid.eq(0),
+                        m.d.sync += sample0.eq(self.tap.o.payload)
+                        with m.If(xfade):
+                            m.next = 'TAP1'
+                        with m.Else():
+                            m.d.sync += self.o.payload.eq(self.tap.o.payload)
+                            m.next = 'WAIT-READY'
+                with m.State('TAP1'):
+                    m.d.comb += [
+                        self.tap.o.ready.eq(1),
+                        self.tap.i.valid.eq(1),
+                        self.tap.i.payload.eq(delay1.truncate() >> delay1.f_bits),
                     ]
-                m.next = 'MAC0'
-            with m.State('MAC0'):
-                with mp.Multiply(m, a=sample0, b=env0):
-                    m.d.sync += self.o.payload.eq(mp.result.z)
-                    m.next = 'MAC1'
-            with m.State('MAC1'):
-                with mp.Multiply(m, a=sample1, b=env1):
-                    m.d.sync += self.o.payload.eq(self.o.payload + mp.result.z)
+                    with m.If(self.tap.o.valid):
+                        m.d.comb += self.tap.i.valid.eq(0),
+                        m.d.sync += sample1.eq(self.tap.o.payload)
+                        m.next = 'ENV'
+            else:
+                # Both taps are read in parallel, each may respond on a
+                # different cycle.
+                done0 = Signal()
+                done1 = Signal()
+                with m.State('TAP0'):
+                    for tap, done, sample, payload, needed in [
+                            (self.tap,  done0, sample0, 1+delay0.truncate() >> delay0.f_bits, 1),
+                            (self.tap1, done1, sample1, delay1.truncate() >> delay1.f_bits, xfade)]:
+                        with m.If(~done & needed):
+                            m.d.comb += [
+                                tap.o.ready.eq(1),
+                                tap.i.valid.eq(1),
+                                tap.i.payload.eq(payload),
+                            ]
+                            with m.If(tap.o.valid):
+                                m.d.comb += tap.i.valid.eq(0),
+                                m.d.sync += [
+                                    sample.eq(tap.o.payload),
+                                    done.eq(1),
+                                ]
+                    with m.If((done0 | self.tap.o.valid) & (done1 | self.tap1.o.valid | ~xfade)):
+                        m.d.sync += [
+                            done0.eq(0),
+                            done1.eq(0),
+                        ]
+                        with m.If(xfade):
+                            m.next = 'ENV'
+                        with m.Else():
+                            # Tap 0 must have just arrived.
+                            m.d.sync += self.o.payload.eq(self.tap.o.payload)
+                            m.next = 'WAIT-READY'
+            with m.State('ENV'):
+                # Registered, so the subtraction is not in front of the multiplier.
+                m.d.sync += diff.eq(sample0 - sample1)
+                # Map delay0 <= [0, xfade] to env <= [0, 1]
+                m.d.sync += env.eq(delay0 >> self.xfade_bits)
+                m.next = 'MAC'
+            with m.State('MAC'):
+                with mp.Multiply(m, a=diff, b=env):
+                    m.d.sync += self.o.payload.eq(sample1 + mp.result.z)
                     m.next = 'WAIT-READY'
             with m.State('WAIT-READY'):
                 m.d.comb += self.o.valid.eq(1),
@@ -2,6 +2,10 @@
 #
 # SPDX-License-Identifier: CERN-OHL-S-2.0
 
+from types import SimpleNamespace
+
+import numpy as np
+
 from amaranth import *
 from amaranth.lib import data, stream, wiring
 from amaranth.lib.memory import Memory
@@ -11,6 +15,7 @@ from scipy import signal
 from amaranth_future import fixed
 
 from . import ASQ, mac
+from .misc import naf, named_submodules
 
 
 class SVF(wiring.Component):
@@ -22,7 +27,10 @@ class SVF(wiring.Component):
     bandpass outputs available on stream payloads `hp`, `lp`, `bp`.
 
     Includes 2x oversampling internally for improved stability close to Nyquist
-    / at high resonances. Each output sample uses 6 multiplies.
+    / at high resonances. Each output sample uses 6 multiplies. If a second MAC
+    provider ``macp2`` is given, the 2 multiplies of each iteration that only
+    depend on the previous bandpass state are issued in parallel, such that
+    each output sample needs 4 rather than 6 MAC steps.
 
     Reference: Fig.3 in https://arxiv.org/pdf/2111.05592
 
@@ -35,15 +43,18 @@ class SVF(wiring.Component):
         Output stream for getting high-, low-, bandpass samples from the filter.
     """
 
-    def __init__(self, sq=ASQ, macp=None):
+    def __init__(self, sq=ASQ, macp=None, macp2=None):
         """
         sq : fixed.SQ
             Data type for all input/output payloads of the SVF.
         macp : mac.MAC
             Optional shared MAC provider.
+        macp2 : mac.MAC
+            Optional second MAC provider, used in parallel with ``macp``.
         """
         self.sq = sq
         self.macp = macp or mac.MAC.default()
+        self.macp2 = macp2
         super().__init__({
             "i": In(stream.Signature(data.StructLayout({
                     "x": sq,
@@ -61,6 +72,8 @@ class SVF(wiring.Component):
         m = Module()
 
         m.submodules.macp = mp = self.macp
+        if self.macp2 is not None:
+            m.submodules.macp2 = mp2 = self.macp2
 
         x     = Signal(mac.SQNative)
         kK    = Signal.like(x)
@@ -74,43 +87,83 @@ class SVF(wiring.Component):
         n_oversample = 2
         oversample = Signal(range(n_oversample))
 
+        def accept():
+            # Latch a new input sample and start the first MAC.
+            with m.If(self.i.valid):
+               m.d.sync += x.eq(self.i.payload.x),
+               m.d.sync += oversample.eq(0)
+               with m.If(self.i.payload.cutoff >= 0):
+                   m.d.sync += kK.eq(self.i.payload.cutoff)
+               with m.If(self.i.payload.resonance >= 0):
+                   m.d.sync += kQinv.eq(self.i.payload.resonance)
+               m.next = 'MAC0'
+
         with m.FSM() as fsm:
 
             with m.State('WAIT-VALID'):
                 m.d.comb += self.i.ready.eq(1),
-                with m.If(self.i.valid):
-                   m.d.sync += x.eq(self.i.payload.x),
-                   m.d.sync += oversample.eq(0)
-                   with m.If(self.i.payload.cutoff >= 0):
-                       m.d.sync += kK.eq(self.i.payload.cutoff)
-                   with m.If(self.i.payload.resonance >= 0):
-                       m.d.sync += kQinv.eq(self.i.payload.resonance)
-                   m.next = 'MAC0'
-
-            with m.State('MAC0'):
-                # alp = abp*kK + alp
-                with mp.Multiply(m, a=abp, b=kK):
-                    m.d.sync += alp.eq(mp.result.z + alp)
-                    m.next = 'MAC1'
-
-            with m.State('MAC1'):
-                # ahp = abp*-kQinv + (x - alp)
-                with mp.Multiply(m, a=abp, b=-kQinv):
-                    m.d.sync += ahp.eq(mp.result.z + (x - alp))
-                    m.next = 'MAC2'
+                accept()
+
+            if self.macp2 is None:
+
+                with m.State('MAC0'):
+                    # alp = abp*kK + alp
+                    with mp.Multiply(m, a=abp, b=kK):
+                        m.d.sync += alp.eq(mp.result.z + alp)
+                        m.next = 'MAC1'
+
+                with m.State('MAC1'):
+                    # ahp = abp*-kQinv + (x - alp)
+                    with mp.Multiply(m, a=abp, b=-kQinv):
+                        m.d.sync += ahp.eq(mp.result.z + (x - alp))
+                        m.next = 'MAC2'
+
+                # 'ahp' is complete before MAC2.
+                ahp_next = ahp
+
+            else:
+
+                # Both multiplies only depend on the previous 'abp', so they
+                # are issued together. As the MAC providers may answer on
+                # different cycles, 'ahp' first holds abp*-kQinv + x, and
+                # the new 'alp' is only subtracted from it during MAC2.
+                done0 = Signal()
+                done1 = Signal()
+                ahp_next = Signal.like(ahp)
+                m.d.comb += ahp_next.eq(ahp - alp)
+
+                with m.State('MAC0'):
+                    with m.If(~done0):
+                        # alp = abp*kK + alp
+                        with mp.Multiply(m, a=abp, b=kK):
+                            m.d.sync += alp.eq(mp.result.z + alp)
+                            m.d.sync += done0.eq(1)
+                    with m.If(~done1):
+                        # ahp = abp*-kQinv + x
+                        with mp2.Multiply(m, a=abp, b=-kQinv):
+                            m.d.sync += ahp.eq(mp2.result.z + x)
+                            m.d.sync += done1.eq(1)
+                    with m.If((done0 | mp.valid) & (done1 | mp2.valid)):
+                        m.d.sync += [
+                            done0.eq(0),
+                            done1.eq(0),
+                        ]
+                        m.next = 'MAC2'
 
             with m.State('MAC2'):
                 # abp = ahp*kK + abp
-                with mp.Multiply(m, a=ahp, b=kK):
+                with mp.Multiply(m, a=ahp_next, b=kK):
                     m.d.sync += abp.eq(mp.result.z + abp)
-                    m.next = 'OVER'
-
-            with m.State('OVER'):
-                with m.If(oversample == n_oversample - 1):
-                    m.next = 'WAIT-READY'
-                with m.Else():
-                    m.d.sync += oversample.eq(oversample + 1)
-                    m.next = 'MAC0'
+                    m.d.sync += ahp.eq(ahp_next)
+                    # Each oversampling iteration depends on the `abp` we
+                    # just computed, so iterations cannot overlap. Instead,
+                    # loop straight back to MAC0 so the multiplier is
+                    # requested on every clock of the oversampling loop.
+                    with m.If(oversample == n_oversample - 1):
+                        m.next = 'WAIT-READY'
+                    with m.Else():
+                        m.d.sync += oversample.eq(oversample + 1)
+                        m.next = 'MAC0'
 
             with m.State('WAIT-READY'):
                 m.d.comb += [
@@ -121,6 +174,9 @@ class SVF(wiring.Component):
                 ]
                 with m.If(self.o.ready):
                     m.next = 'WAIT-VALID'
+                    # The next sample may be taken in the same cycle.
+                    m.d.comb += self.i.ready.eq(1),
+                    accept()
 
         return m
 
@@ -173,15 +229,17 @@ class DCBlock(wiring.Component):
             with m.State('WAIT-VALID'):
                 m.d.comb += self.i.ready.eq(1)
                 with m.If(self.i.valid):
+                   # Pre-add the input difference, such that the MAC
+                   # below maps to a single P = C - A*B operation.
                    m.d.sync += [
                        x.eq(self.i.payload),
-                       acc.eq(acc - x),
+                       acc.eq(acc + self.i.payload - x),
                    ]
                    m.next = 'MAC0'
 
             with m.State('MAC0'):
                 with mp.Multiply(m, a=y, b=kA):
-                    m.d.sync += acc.eq((acc - mp.result.z) + x)
+                    m.d.sync += acc.eq(acc - mp.result.z)
                     m.next = 'WAIT-READY'
 
             with m.State('WAIT-READY'):
@@ -251,7 +309,7 @@ class OnePole(wiring.Component):
 class FIR(wiring.Component):
 
     """
-    Fixed-point FIR filter that uses a single multiplier.
+    Fixed-point FIR filter that uses one or more multipliers.
 
     This filter contains some optional optimizations to act as an efficient
     interpolator/decimator. For details, see :py:`stride_i`, :py:`stride_o` below.
@@ -262,9 +320,20 @@ class FIR(wiring.Component):
         Input stream for sending samples to the filter.
     o : :py:`In(stream.Signature(ASQ))`
         Output stream for getting samples from the filter. There is 1 output
-        sample per input sample, presented :py:`filter_order+1` cycles after
-        the input sample. For :py:`stride_o > 1`, there is only 1 output
-        sample per :py:`stride_o` input samples.
+        sample per input sample, presented :py:`filter_order/n_mac+1` cycles after
+        the input sample (or :py:`ceil(filter_order/2)+1` cycles for folded,
+        symmetric filters), plus 2 cycles if :py:`pipeline` is set. For :py:`stride_o > 1`, there is only 1 output
+        sample per :py:`stride_o` input samples. For :py:`backend == "csd"`, a
+        new sample is accepted every cycle, and outputs are presented
+        :py:`ceil(log2(n_terms))+1` cycles after the input sample, where
+        :py:`n_terms` is the total number of nonzero tap digits. For
+        :py:`backend == "systolic"`, a new sample is also accepted every cycle,
+        and outputs are presented 1 cycle after the input sample.
+
+    Linear-phase (symmetric) filters with :py:`stride_i == 1` and :py:`n_mac == 1`
+    are folded, i.e. each pair of samples sharing a tap coefficient is summed
+    before a single multiply. This halves the MAC cycles and tap storage (or,
+    for :py:`backend == "blmac"`, the number of additions).
     """
 
     def __init__(self,
@@ -275,7 +344,15 @@ class FIR(wiring.Component):
                  prescale:         float=1,
                  stride_i:         int=1,
                  stride_o:         int=1,
-                 shape=ASQ):
+                 shape=ASQ,
+                 n_mac:            int=1,
+                 backend:          str='mac',
+                 taps=None,
+                 commutator:       bool=False,
+                 pipeline:         bool=False,
+                 tap_bits:         int=None,
+                 csd_terms:        int=None,
+                 normalize_taps:   bool=False):
         """
         fs : int
             Sample rate of the filter, used for calculating FIR coefficients.
@@ -306,18 +383,95 @@ class FIR(wiring.Component):
             1 sample and discard M-1 samples (if decimating by factor M). For
             :py:`stride_o == M`, only 1 output sample is produced per M input
             samples. This does not reduce LUT/RAM usage, but avoids performing
-            MACs to produce samples that will be discarded.
+            MACs to produce samples that will be discarded: discarded samples
+            are accepted in a single cycle, so MAC cycles are reduced by a
+            factor M.
         shape : fixed.Shape
             Fixed-point shape for input/output samples. Defaults to ASQ.
+        n_mac : int
+            Number of multipliers used in parallel, such that :py:`n_mac` MACs
+            are performed every cycle, reducing latency by the same factor.
+            For :py:`n_mac == 2`, both read ports of the (single) sample memory
+            are used, and pairs of taps are packed into each tap memory word.
+            Otherwise, tap and sample storage is split into :py:`n_mac`
+            interleaved memories.
+            :py:`n_mac` must evenly divide :py:`filter_order/stride_i`.
+        backend : str
+            :py:`"mac"` (default) uses hardware multipliers. :py:`"blmac"` uses
+            no multipliers at all, instead evaluating the dot product one
+            bit-layer of the (constant) taps at a time, from MSB to LSB, by
+            adding or subtracting samples into a shifting accumulator. Taps
+            are recoded in non-adjacent form to minimize the number of
+            additions. Latency then depends on the number of nonzero tap
+            digits rather than :py:`filter_order`. Requires :py:`n_mac == 1`.
+            :py:`"csd"` is fully unrolled and also uses no multipliers: every
+            tap is a constant shift-add network over a delay line of samples,
+            summed by a pipelined adder tree. This is only sensible for short
+            filters, and requires :py:`stride_i == 1` and :py:`n_mac == 1`.
+            :py:`"systolic"` is also fully unrolled (with the same requirements),
+            but uses one hardware multiplier per tap in transposed form, such
+            that the products are summed along a chain of registers.
+        taps : [float]
+            Explicit filter coefficients. If provided, these are used instead
+            of designing the filter from :py:`fs`, :py:`filter_cutoff_hz` and
+            :py:`filter_type`, and :py:`len(taps)` must equal :py:`filter_order`.
+        commutator : bool
+            For use as a polyphase resampler. Instead of expecting S-1 zeroes
+            after every input sample, only nonzero samples are sent to the
+            filter and the :py:`stride_i` phases between them are implied.
+            Only the phases that survive :py:`stride_o` decimation are computed,
+            so no cycles at all are spent on zero padding or discarded outputs.
+        pipeline : bool
+            Register the multiplier inputs and outputs, such that the memory
+            reads, multiplies and accumulation are in separate pipeline stages
+            (matching the internal A/B, M and P registers of most DSP tiles).
+            This raises Fmax at the cost of 2 extra cycles of latency per
+            output sample. Only applies to :py:`backend == "mac"`.
+        tap_bits : int
+            If set, taps are quantized to :py:`tap_bits` wide words (with the
+            same range as samples) rather than the full sample width. Narrower
+            taps map to smaller (or fewer) hardware multipliers and tap memories,
+            and need fewer bit layers for :py:`backend == "blmac"`, at the cost
+            of some stopband attenuation. Products are still accumulated at
+            full sample precision.
+        csd_terms : int
+            For :py:`backend == "csd"`, approximate each tap by at most
+            :py:`csd_terms` signed powers of two (3-5 is typical), trading
+            some stopband attenuation for fewer adders. By default, taps are
+            exact (canonical signed digits of the quantized tap).
+        normalize_taps : bool
+            Store every tap shifted left by its own amount, such that it uses
+            the full width of the tap word, and shift each product right by
+            the same amount before it is accumulated. Small taps (most of the
+            taps of a long interpolation filter) then keep all of their
+            significant bits, which matters most for small :py:`tap_bits`.
+            Only applies to :py:`backend == "mac"`.
         """
         self.shape = shape
-        taps = signal.firwin(numtaps=filter_order, cutoff=filter_cutoff_hz,
-                             fs=fs, pass_zero=filter_type, window='hamming')
+        if taps is None:
+            taps = signal.firwin(numtaps=filter_order, cutoff=filter_cutoff_hz,
+                                 fs=fs, pass_zero=filter_type, window='hamming')
+        else:
+            taps = np.asarray(taps)
+            assert len(taps) == filter_order
         assert len(taps) % stride_i == 0
+        assert (len(taps) // stride_i) % n_mac == 0
+        assert backend in ['mac', 'blmac', 'csd', 'systolic']
+        assert backend == 'mac' or n_mac == 1
+        assert backend not in ['csd', 'systolic'] or (stride_i == 1 and not commutator)
+        assert backend == 'mac' or not normalize_taps
         self.taps_float = taps
         self.prescale   = prescale
         self.stride_i   = stride_i
         self.stride_o   = stride_o
+        self.n_mac      = n_mac
+        self.backend    = backend
+        self.commutator = commutator
+        self.pipeline   = pipeline
+        self.tap_bits   = tap_bits
+        self.csd_terms  = csd_terms
+        self.normalize_taps = normalize_taps
+        self.symmetric  = np.allclose(taps, taps[::-1])
         super().__init__({
             "i": In(stream.Signature(shape)),
             "o": Out(stream.Signature(shape)),
@@ -329,141 +483,670 @@ class FIR(wiring.Component):
         # Tap and accumulator sizes
 
         self.ctype = fixed.SQ(2, self.shape.f_bits)
+        if self.tap_bits is None:
+            self.ttype = self.ctype
+        else:
+            self.ttype = fixed.SQ(2, self.tap_bits - 2)
 
         n = len(self.taps_float)
 
-        # Filter tap memory and read port
+        # Accumulator has enough integer bits that it can never wrap, it
+        # is only saturated once on the way out.
+        self.atype = fixed.SQ(2 + (n-1).bit_length(), self.shape.f_bits)
+
+        if self.backend == 'csd':
+            return self.elaborate_csd(m)
+        if self.backend == 'systolic':
+            return self.elaborate_systolic(m)
+        if self.backend == 'blmac':
+            return self.elaborate_blmac(m)
+
+        # Fold symmetric taps, such that each MAC cycle multiplies the sum
+        # of 2 samples that share the same tap coefficient.
+        n_mac  = self.n_mac
+        fold   = self._fold()
+
+        # MAC units are spread over 'n_bank' interleaved memories with
+        # 'n_port' read ports each. Block RAMs have 2 ports for free.
+        n_port  = 2 if n_mac == 2 else 1
+        n_bank  = n_mac // n_port
+
+        # Depth of each interleaved sample memory, and number of MAC
+        # cycles per output sample.
+        x_depth = n//(self.stride_i*n_bank)
+        n_cyc   = (n+1)//2 if fold else x_depth//n_port
+
+        # Filter tap memories and read ports. Tap memory 'k' contains every
+        # tap needed by MAC unit 'k' (or MAC units sharing its ports), such
+        # that all tap memories share the same read address. MAC units that
+        # share a sample memory use adjacent taps, which are packed into a
+        # single tap word, so that only 1 tap read port is needed per bank.
+        # For stride_i > 1, the taps of each polyphase branch are stored in
+        # a contiguous block, so every MAC reads the next tap address.
+
+        # Small tap memories are read asynchronously, so they can be
+        # implemented as LUT ROMs rather than occupying a block RAM.
+        # Synchronous tap reads are instead issued 1 MAC ahead.
+        n_rows   = n_cyc if fold else x_depth
+        taps_rom = n_rows*self.stride_i <= 64
+        tap_lead = 0 if taps_rom else 1
+
+        # With 'normalize_taps', each tap word also holds the amount that
+        # the tap was shifted left by, which the product is shifted right by.
+        if self.normalize_taps:
+            tap_layout = data.StructLayout({
+                "tap":   self.ttype,
+                "shift": range(self.ttype.f_bits + 1),
+            })
+        else:
+            tap_layout = self.ttype
+
+        def tap_word(t):
+            # If t*prescale overflows, fixed.Const should provide a warning.
+            t = t*self.prescale
+            if not self.normalize_taps:
+                return fixed.Const(t, shape=self.ttype)
+            shift = 0
+            t_max = self.ttype.max().as_float()
+            while t != 0 and shift < self.ttype.f_bits and abs(t*2) <= t_max:
+                t *= 2
+                shift += 1
+            return {"tap": fixed.Const(t, shape=self.ttype), "shift": shift}
+
+        taps_mem = [
+            Memory(shape=data.ArrayLayout(tap_layout, n_port),
+                   depth=n_rows*self.stride_i//n_port, init=[
+                [tap_word(self.taps_float[((c*n_port+j)*n_bank+k)*self.stride_i+s])
+                 for j in range(n_port)]
+                for s in range(self.stride_i)
+                for c in range(n_rows//n_port)
+            ])
+            for k in range(n_bank)
+        ]
+        named_submodules(m.submodules, taps_mem, override_name="taps_mem")
+
+        taps_rport = [mem.read_port(domain="comb" if taps_rom else "sync")
+                      for mem in taps_mem]
 
-        # If t*prescale overflows, fixed.Const should provide a warning.
-        m.submodules.taps_mem = taps_mem = Memory(
-            shape=self.ctype, depth=n, init=[
-                fixed.Const(t*self.prescale, shape=self.ctype)
-                for t in self.taps_float
+        # Input sample memories and positions
+
+        samples = self._sample_memories(m, n_mac, n_port, x_depth, fold)
+        x_rport, x_rport2 = samples.x_rport, samples.x_rport2
+        w_pos, w_mem = samples.w_pos, samples.w_mem
+        prev, succ = samples.prev, samples.succ
+
+        # FIR filter logic
+
+        # Number of MAC cycles performed per sample, up to n/(stride_i*n_mac)
+        macs   = Signal(range(n_cyc))
+
+        # Read indices into tap and sample memories, all derived from 'macs'
+        ix_tap = Signal(range(n//n_port + self.stride_i))
+
+        # First tap address of the polyphase branch being computed.
+        phase_base = Array(s*(n_rows//n_port) for s in range(self.stride_i))
+        if self.stride_i > 1:
+            tap_base = Signal(range(n//n_port))
+        else:
+            tap_base = 0
+        ix_rd  = Signal(range(x_depth))
+        ix_rd2 = Signal(range(x_depth))
+
+        # MAC variables: y = sum(a[k] * b[k])
+        a  = [Signal(self.ctype, name=f"a{k}") for k in range(n_mac)]
+        b  = [Signal(tap_layout, name=f"b{k}") for k in range(n_mac)]
+        y  = Signal(self.atype)
+
+        def product(a, b):
+            if not self.normalize_taps:
+                return a * b
+            p = a * b.tap
+            return fixed.Value.cast(p.as_value() >> b.shift, p.f_bits)
+
+        if self.pipeline:
+            # Registered multiplier inputs and products. These are cleared
+            # on every new output sample, so stale products never land in 'y'.
+            a_r = [Signal(self.ctype, name=f"a_r{k}") for k in range(n_mac)]
+            b_r = [Signal(tap_layout, name=f"b_r{k}") for k in range(n_mac)]
+            m_r = [Signal(product(a_r[k], b_r[k]).shape(), name=f"m_r{k}") for k in range(n_mac)]
+            # Cycles spent waiting for the last products to land in 'y'.
+            drain = Signal(range(2))
+
+        def adder_tree(p):
+            p = list(p)
+            while len(p) > 1:
+                p = [p[k] + p[k+1] for k in range(0, len(p)-1, 2)] + p[len(p)-len(p)%2:]
+            return p[0]
+
+        def x_addr(k, addr, mem=w_mem):
+            if n_port > 1:
+                # The second port reads one sample behind.
+                return prev(addr) if k % n_port else addr
+            # Memories 'above' the latest sample lag by one address.
+            return Mux(k > mem, prev(addr), addr)
+
+        def wrap(addr):
+            # Wrap an address within -x_depth .. 2*x_depth-1 into the memory.
+            if x_depth & (x_depth - 1) == 0:
+                return addr[:(x_depth - 1).bit_length()]
+            return Mux(addr < 0, addr + x_depth,
+                       Mux(addr >= x_depth, addr - x_depth, addr))
+
+        # Reads issued during MAC cycle 'macs' are for the next MAC (taps for
+        # the current MAC if they are read asynchronously). During MACs,
+        # 'stride_i_pos' is always the stride_i phase being computed.
+        m.d.comb += [
+            ix_tap.eq(tap_base + macs + tap_lead),
+            ix_rd.eq(wrap(w_pos - (macs + 1)*n_port)),
+            ix_rd2.eq(wrap(w_pos + macs + 2)),
+        ]
+
+        for k in range(n_bank):
+            m.d.comb += taps_rport[k].addr.eq(ix_tap)
+            if not taps_rom:
+                m.d.comb += taps_rport[k].en.eq(1)
+
+        for k in range(n_mac):
+            m.d.comb += x_rport[k].addr.eq(x_addr(k, ix_rd))
+
+        if fold:
+            m.d.comb += x_rport2.addr.eq(ix_rd2)
+
+        def start_mac(w_pos, w_mem, phase):
+            # Set up first MAC combinatorially, given the position of the
+            # latest sample and the stride_i phase to compute.
+            for k in range(n_mac):
+                m.d.comb += x_rport[k].addr.eq(x_addr(k, w_pos, w_mem))
+            if not taps_rom:
+                for k in range(n_bank):
+                    m.d.comb += taps_rport[k].addr.eq(phase_base[phase])
+            if self.stride_i > 1:
+                m.d.sync += tap_base.eq(phase_base[phase])
+            if fold:
+                m.d.comb += x_rport2.addr.eq(succ(w_pos))
+            # Subsequent MACs use ix_rd / ix_tap.
+            m.d.sync += [
+                y.eq(0),
+                macs.eq(0),
             ]
-        )
+            if self.pipeline:
+                m.d.sync += [a_r[k].eq(0) for k in range(n_mac)]
+                m.d.sync += [m_r[k].eq(0) for k in range(n_mac)]
+                m.d.sync += drain.eq(0)
 
-        taps_rport = taps_mem.read_port()
+        with m.FSM():
+            self._wait_valid(m, samples, start_mac, "MAC")
 
-        # Input sample memory, write and read port
+            with m.State("MAC"):
+                m.d.comb += [a[k].eq(x_rport[k].data) for k in range(n_mac)]
+                if fold:
+                    # The center tap of odd-length filters has no pair.
+                    with m.If((macs != (n_cyc - 1)) | (n % 2 == 0)):
+                        m.d.comb += a[0].eq(x_rport[0].data + x_rport2.data)
+                if n_port > 1:
+                    m.d.comb += [b[k].eq(taps_rport[0].data[k]) for k in range(n_mac)]
+                else:
+                    # Sample memory 'k' holds the sample for MAC unit
+                    # '(w_mem - k) % n_mac', rotate taps to match.
+                    with m.Switch(w_mem):
+                        for r in range(n_mac):
+                            with m.Case(r):
+                                m.d.comb += [
+                                    b[k].eq(taps_rport[(r-k)%n_mac].data[0])
+                                    for k in range(n_mac)
+                                ]
+                # Adder tree over all (possibly registered) products
+                if self.pipeline:
+                    m.d.sync += [a_r[k].eq(a[k]) for k in range(n_mac)]
+                    m.d.sync += [b_r[k].eq(b[k]) for k in range(n_mac)]
+                    m.d.sync += [m_r[k].eq(product(a_r[k], b_r[k])) for k in range(n_mac)]
+                    p = list(m_r)
+                else:
+                    p = [product(a[k], b[k]) for k in range(n_mac)]
+                m.d.sync += [
+                    y.eq(y + adder_tree(p)),
+                    macs.eq(macs+1),
+                ]
+                # done?
+                with m.If(macs == (n_cyc - 1)):
+                    m.next = "DRAIN" if self.pipeline else "WAIT-READY"
 
-        m.submodules.x_mem = x_mem = Memory(
-            shape=self.ctype, depth=n//self.stride_i, init=[]
-        )
+            if self.pipeline:
+                with m.State("DRAIN"):
+                    # Flush the last products through the pipeline.
+                    m.d.sync += [m_r[k].eq(product(a_r[k], b_r[k])) for k in range(n_mac)]
+                    m.d.sync += [
+                        y.eq(y + adder_tree(m_r)),
+                        drain.eq(drain + 1),
+                    ]
+                    with m.If(drain == 1):
+                        m.next = "WAIT-READY"
 
-        x_wport = x_mem.write_port()
-        x_rport = x_mem.read_port(transparent_for=(x_wport,))
+            self._wait_ready(m, samples, y)
 
-        # FIR filter logic
+        return m
+
+    def elaborate_blmac(self, m):
+
+        n     = len(self.taps_float)
+        fold  = self._fold()
+
+        # Single MAC unit, one sample memory with one read port (and a second
+        # one when folded).
+        x_depth = n//self.stride_i
+        n_cyc   = (n+1)//2 if fold else x_depth
+
+        # Bit-layer program used instead of tap memories. For each stride_i
+        # position, visit every layer of the taps from MSB to LSB. Each entry
+        # adds (or subtracts) sample 'j' to the accumulator, doubling it first
+        # if this is a new layer. When folded, entry 'j' instead adds the pair
+        # of samples sharing tap 'j'.
+
+        prog  = []
+        start = []
+        acc_max = 0
+        for s in range(self.stride_i):
+            taps_q = [
+                fixed.Const(self.taps_float[j*self.stride_i+s]*self.prescale,
+                            shape=self.ttype).as_integer_ratio()[0]
+                for j in range(n_cyc)
+            ]
+            acc_max = max(acc_max, 2*sum(abs(t) for t in taps_q))
+            digits = [naf(t) for t in taps_q]
+            phase = []
+            for layer in reversed(range(max(len(d) for d in digits))):
+                entries = [
+                    {"j": j, "add": 1, "neg": int(d[layer] < 0), "shift": 0, "last": 0}
+                    for j, d in enumerate(digits)
+                    if layer < len(d) and d[layer] != 0
+                ]
+                if not entries:
+                    entries = [{"j": 0, "add": 0, "neg": 0, "shift": 0, "last": 0}]
+                entries[0]["shift"] = 1
+                phase += entries
+            if not phase:
+                phase = [{"j": 0, "add": 0, "neg": 0, "shift": 0, "last": 0}]
+            phase[-1]["last"] = 1
+            start.append(len(prog))
+            prog += phase
+
+        m.submodules.prog_mem = prog_mem = Memory(
+            shape=data.StructLayout({
+                "j":     range(x_depth),
+                "add":   1,
+                "neg":   1,
+                "shift": 1,
+                "last":  1,
+            }),
+            depth=len(prog), init=prog)
+
+        # Small enough to live in LUTs, read asynchronously.
+        prog_rport = prog_mem.read_port(domain="comb")
+
+        ix_prog  = Signal(range(len(prog)))
+        prog_d   = Signal.like(prog_rport.data)
+        issued   = Signal()
+        acc      = Signal(signed(self.ctype.as_shape().width + acc_max.bit_length() + 2))
+        acc_next = Signal.like(acc)
+        y        = Signal(self.atype)
+
+        m.d.comb += prog_rport.addr.eq(ix_prog)
+
+        # Input sample memory and positions
+
+        samples = self._sample_memories(m, 1, 1, x_depth, fold)
+        x_rport, x_rport2 = samples.x_rport[0], samples.x_rport2
+        w_pos = samples.w_pos
+
+        def start_blmac(w_pos, w_mem, phase):
+            # Start the program of the stride_i phase to compute. Sample
+            # reads are issued by the program itself.
+            m.d.sync += [
+                ix_prog.eq(Array(start)[phase]),
+                issued.eq(0),
+                acc.eq(0),
+            ]
+
+        with m.FSM():
+            self._wait_valid(m, samples, start_blmac, "BLMAC")
+
+            with m.State("BLMAC"):
+                # Issue one program entry per cycle as a sample read..
+                j = prog_rport.data.j
+                m.d.comb += x_rport.addr.eq(
+                    Mux(j > w_pos, w_pos + x_depth - j, w_pos - j))
+                if fold:
+                    # Oldest sample sharing this tap.
+                    m.d.comb += x_rport2.addr.eq(
+                        Mux(w_pos + 1 + j >= x_depth, w_pos + 1 + j - x_depth, w_pos + 1 + j))
+                with m.If(~prog_rport.data.last):
+                    m.d.sync += ix_prog.eq(ix_prog + 1)
+                m.d.sync += [
+                    prog_d.eq(prog_rport.data),
+                    issued.eq(1),
+                ]
+                # ..and accumulate the entry issued on the previous cycle.
+                with m.If(issued):
+                    x = x_rport.data.as_value()
+                    if fold:
+                        # The center tap of odd-length filters has no pair.
+                        x = Mux((prog_d.j != n_cyc - 1) | (n % 2 == 0),
+                                x + x_rport2.data.as_value(), x)
+                    m.d.comb += acc_next.eq(
+                        Mux(prog_d.shift, acc << 1, acc) +
+                        Mux(prog_d.add, Mux(prog_d.neg, -x, x), 0))
+                    m.d.sync += acc.eq(acc_next)
+                    with m.If(prog_d.last):
+                        m.d.sync += y.as_value().eq(acc_next >> self.ttype.f_bits)
+                        m.next = "WAIT-READY"
+
+            self._wait_ready(m, samples, y)
 
-        # Number of MACs performed per sample, up to n/self.stride
-        macs   = Signal(range(n))
+        return m
+
+    def _fold(self):
+        """
+        Whether symmetric taps are folded, such that each MAC cycle (or
+        :py:`blmac` program entry) uses the sum of 2 samples sharing a tap.
+        """
+        return self.symmetric and self.stride_i == 1 and self.n_mac == 1
+
+    def _sample_memories(self, m, n_mac, n_port, x_depth, fold):
+        """
+        Input sample memories and write/stride positions, shared by the
+        :py:`mac` and :py:`blmac` backends. Sample position 'p' is stored in
+        memory 'p % n_bank' at address 'p // n_bank'. Read port 'k' is for
+        MAC unit 'k', read addresses are left to the backend.
+        """
 
-        # Write position in input sample memory
-        w_pos  = Signal(range(n), init=1)
+        n_bank = n_mac // n_port
+
+        x_mem = [Memory(shape=self.ctype, depth=x_depth, init=[]) for _ in range(n_bank)]
+        named_submodules(m.submodules, x_mem, override_name="x_mem")
+
+        x_wport = [mem.write_port() for mem in x_mem]
+        x_rport = [x_mem[k // n_port].read_port(transparent_for=(x_wport[k // n_port],))
+                   for k in range(n_mac)]
+
+        # Second read port walks from the oldest sample forwards.
+        x_rport2 = x_mem[0].read_port() if fold else None
+
+        # Write position (address, memory) of the latest input sample,
+        # and the position following it.
+        w_pos  = Signal(range(x_depth))
+        w_mem  = Signal(range(n_bank))
+        w_pos_next = Signal.like(w_pos)
+        w_mem_next = Signal.like(w_mem)
 
         # Stride position from 0 .. self.stride_i, moves by 1 every
         # input sample to shift taps looked at (even if the input
-        # is padded with zeroes)
-        stride_i_pos  = Signal(range(self.stride_i), init=0)
+        # is padded with zeroes). For 'commutator', this is instead the
+        # next phase to be computed, which moves by 'stride_o' for every
+        # output, and by '-stride_i' for every input sample.
+        if self.commutator:
+            stride_i_pos  = Signal(range(self.stride_i + self.stride_o), init=self.stride_i)
+        else:
+            stride_i_pos  = Signal(range(self.stride_i), init=0)
 
         # Stride position from 0 .. self.stride_o, moves by 1 every
         # output sample. For 'stride_o' == M, output sample is only
         # calculated/emitted once per every M samples.
         stride_o_pos  = Signal(range(self.stride_o), init=0)
 
-        # Read indices into tap and sample memories
-        ix_tap = Signal(range(n))
-        ix_rd  = Signal(range(n))
+        def prev(addr):
+            return Mux(addr == 0, x_depth - 1, addr - 1)
+
+        def succ(addr):
+            return Mux(addr == x_depth - 1, 0, addr + 1)
 
-        # MAC variables: y = a * b
-        a  = Signal(self.ctype)
-        b  = Signal(self.ctype)
-        y  = Signal(self.ctype)
+        for k in range(n_bank):
+            m.d.comb += [
+                x_wport[k].data.eq(self.i.payload),
+                x_wport[k].addr.eq(w_pos),
+            ]
 
-        m.d.comb += taps_rport.en.eq(1)
-        m.d.comb += taps_rport.addr.eq(ix_tap)
-        m.d.comb += x_wport.data.eq(self.i.payload)
-        m.d.comb += x_rport.addr.eq(ix_rd)
-        m.d.comb += x_rport.en.eq(1)
+        for k in range(n_mac):
+            m.d.comb += x_rport[k].en.eq(1)
 
-        with m.If(w_pos == (n//self.stride_i - 1)):
-            m.d.comb += x_wport.addr.eq(0)
+        if fold:
+            m.d.comb += x_rport2.en.eq(1)
+
+        with m.If(w_mem == (n_bank - 1)):
+            m.d.comb += [
+                w_mem_next.eq(0),
+                w_pos_next.eq(succ(w_pos)),
+            ]
         with m.Else():
-            m.d.comb += x_wport.addr.eq(w_pos+1)
+            m.d.comb += [
+                w_mem_next.eq(w_mem + 1),
+                w_pos_next.eq(w_pos),
+            ]
 
-        valid = Signal()
+        return SimpleNamespace(
+            n_bank=n_bank, x_wport=x_wport, x_rport=x_rport, x_rport2=x_rport2,
+            w_pos=w_pos, w_mem=w_mem, w_pos_next=w_pos_next, w_mem_next=w_mem_next,
+            stride_i_pos=stride_i_pos, stride_o_pos=stride_o_pos,
+            prev=prev, succ=succ)
 
-        with m.FSM() as fsm:
-            with m.State('WAIT-VALID'):
+    def _advance(self, m, s):
+        """
+        Update write and stride positions after every input sample
+        (unused for :py:`commutator`, which tracks its phase directly).
+        """
+        with m.If(s.stride_i_pos == (self.stride_i - 1)):
+            m.d.sync += [
+                s.stride_i_pos.eq(0),
+                s.w_pos.eq(s.w_pos_next),
+                s.w_mem.eq(s.w_mem_next),
+            ]
+        with m.Else():
+            m.d.sync += s.stride_i_pos.eq(s.stride_i_pos+1)
+        with m.If(s.stride_o_pos == (self.stride_o - 1)):
+            m.d.sync += s.stride_o_pos.eq(0)
+        with m.Else():
+            m.d.sync += s.stride_o_pos.eq(s.stride_o_pos + 1)
+
+    def _wait_valid(self, m, s, start, next_state):
+        """
+        'WAIT-VALID' state: store incoming samples, and call
+        :py:`start(w_pos, w_mem, phase)` then move to :py:`next_state` for
+        every output sample that is to be computed.
+        """
+        stride_i_pos = s.stride_i_pos
+        with m.State('WAIT-VALID'):
+            if self.commutator:
+                with m.If(stride_i_pos >= self.stride_i):
+                    # All phases of the latest sample are done, take
+                    # the next one.
+                    m.d.comb += self.i.ready.eq(1)
+                    with m.If(self.i.valid):
+                        for k in range(s.n_bank):
+                            m.d.comb += [
+                                s.x_wport[k].addr.eq(s.w_pos_next),
+                                s.x_wport[k].en.eq(s.w_mem_next == k),
+                            ]
+                        m.d.sync += [
+                            s.w_pos.eq(s.w_pos_next),
+                            s.w_mem.eq(s.w_mem_next),
+                            stride_i_pos.eq(stride_i_pos - self.stride_i),
+                        ]
+                        with m.If(stride_i_pos < 2*self.stride_i):
+                            start(s.w_pos_next, s.w_mem_next, stride_i_pos - self.stride_i)
+                            m.next = next_state
+                with m.Else():
+                    start(s.w_pos, s.w_mem, stride_i_pos)
+                    m.next = next_state
+            else:
                 m.d.comb += self.i.ready.eq(1),
                 with m.If(self.i.valid):
                     with m.If(stride_i_pos == 0):
-                        m.d.comb += x_wport.en.eq(1)
-                    # Set up first MAC combinatorially
-                    m.d.comb += x_rport.addr.eq(x_wport.addr)
-                    m.d.comb += taps_rport.addr.eq(stride_i_pos)
-                    # Subsequent MACs use ix_rd / ix_tap.
-                    m.d.sync += [
-                        ix_rd.eq(w_pos),
-                        ix_tap.eq(stride_i_pos + self.stride_i),
-                        y.eq(0),
-                        macs.eq(0),
-                    ]
-
-                    with m.If(stride_o_pos == 0):
-                        m.next = "MAC"
+                        for k in range(s.n_bank):
+                            m.d.comb += s.x_wport[k].en.eq(s.w_mem == k)
+                    with m.If(s.stride_o_pos == 0):
+                        start(s.w_pos, s.w_mem, stride_i_pos)
+                        m.next = next_state
                     with m.Else():
-                        m.next = "WAIT-READY"
+                        # This output would be discarded, so skip the
+                        # MACs and take the next sample on the next cycle.
+                        self._advance(m, s)
 
-            with m.State("MAC"):
-                m.d.comb += [
-                    a.eq(x_rport.data),
-                    b.eq(taps_rport.data),
-                ]
-                m.d.sync += [
-                    y.eq(y + (a * b)),
-                    macs.eq(macs+1),
-                ]
-                # next tap read position
-                m.d.sync += ix_tap.eq(ix_tap + self.stride_i),
-                # next sample read position
-                with m.If(ix_rd == 0):
-                    m.d.sync += ix_rd.eq((n//self.stride_i - 1))
-                with m.Else():
-                    m.d.sync += ix_rd.eq(ix_rd - 1),
-                # done?
-                with m.If(macs == (n//self.stride_i - 1)):
-                    m.next = "WAIT-READY"
+    def _wait_ready(self, m, s, y):
+        """
+        'WAIT-READY' state: emit the (saturated) output sample :py:`y`.
+        """
+        with m.State('WAIT-READY'):
+            m.d.comb += [
+                self.o.valid.eq(1),
+                self.o.payload.eq(y.saturate(self.shape))
+            ]
+            with m.If(self.o.ready):
+                if self.commutator:
+                    # skip straight to the next phase that is kept.
+                    m.d.sync += s.stride_i_pos.eq(s.stride_i_pos + self.stride_o)
+                else:
+                    self._advance(m, s)
+                m.next = 'WAIT-VALID'
+
+    def _csd(self, tap):
+        """
+        Signed digits :py:`[(sign, shift), ...]` of quantized :py:`tap`, such
+        that :py:`tap ~= sum(sign << shift) * 2**-ttype.f_bits`. Limited to
+        :py:`csd_terms` digits by greedily taking the signed power of two
+        closest to the remaining error.
+        """
+        t = fixed.Const(tap*self.prescale, shape=self.ttype).as_integer_ratio()[0]
+        if self.csd_terms is None:
+            return [(d, p) for p, d in enumerate(naf(t)) if d != 0]
+        digits = []
+        while t != 0 and len(digits) < self.csd_terms:
+            p = abs(t).bit_length() - 1
+            if abs(t) - (1 << p) > (2 << p) - abs(t):
+                p += 1
+            sign = 1 if t > 0 else -1
+            digits.append((sign, p))
+            t -= sign << p
+        return digits
+
+    def elaborate_csd(self, m):
+
+        n    = len(self.taps_float)
+        fold = self.symmetric
+
+        # Delay line of the latest 'n' samples, x[0] is the newest.
+        x = [Signal(self.ctype, name=f"x{k}") for k in range(n)]
+
+        # Each nonzero tap digit contributes one shifted (raw) sample to the
+        # sum. For folded, symmetric filters, pairs of samples that share
+        # a tap are added before shifting.
+        n_cyc = (n+1)//2 if fold else n
+        terms = []
+        for j in range(n_cyc):
+            xj = x[j].as_value()
+            if fold and j != n - 1 - j:
+                xj = xj + x[n - 1 - j].as_value()
+            terms += [(xj << shift, sign < 0) for sign, shift in self._csd(self.taps_float[j])]
+        if not terms:
+            terms = [(C(0, 1), False)]
+
+        # Pipelined adder tree. Each term carries a 'negative' flag, so
+        # that negation is folded into the adders rather than done per term.
+        # Every level of the tree is registered.
+        levels = []
+        while len(terms) > 1:
+            level, sums = [], []
+            for k in range(0, len(terms), 2):
+                if k + 1 == len(terms):
+                    v, neg = terms[k]
+                else:
+                    (a, a_neg), (b, b_neg) = terms[k], terms[k+1]
+                    if a_neg == b_neg:
+                        v, neg = a + b, a_neg
+                    elif b_neg:
+                        v, neg = a - b, False
+                    else:
+                        v, neg = b - a, False
+                r = Signal(v.shape(), name=f"sum{len(levels)}_{k//2}")
+                level.append((r, v))
+                sums.append((r, neg))
+            levels.append(level)
+            terms = sums
+        acc, acc_neg = terms[0]
+
+        # The delay line is followed by one stage per tree level.
+        ce, take = self._pipe(m, len(levels) + 1)
+
+        with m.If(ce):
+            for level in levels:
+                m.d.sync += [r.eq(v) for r, v in level]
+        with m.If(take):
+            m.d.sync += x[0].eq(self.i.payload)
+            m.d.sync += [x[k].eq(x[k-1]) for k in range(1, n)]
+
+        y = Signal(self.atype)
+        m.d.comb += [
+            y.as_value().eq((-acc if acc_neg else acc) >> self.ttype.f_bits),
+            self.o.payload.eq(y.saturate(self.shape)),
+        ]
 
-            with m.State('WAIT-READY'):
+        return m
 
-                # if stride_o indicates this sample should be discarded, never
-                # assert 'valid', simply update the stride counters and jump
-                # straight back to 'WAIT-VALID'.
+    def elaborate_systolic(self, m):
 
-                m.d.comb += [
-                    self.o.valid.eq(stride_o_pos == 0),
-                    self.o.payload.eq(y)
-                ]
+        n = len(self.taps_float)
+        taps_q = [
+            fixed.Const(t*self.prescale, shape=self.ttype).as_integer_ratio()[0]
+            for t in self.taps_float
+        ]
 
-                with m.If(self.o.ready | (stride_o_pos != 0)):
+        # Transposed form: every multiplier sees the latest sample, and the
+        # products are summed along a chain of registers, one per tap
+        # (mapping onto cascaded DSP tiles). 'p[0]' is the output.
+        width = (self.ctype.as_shape().width + self.ttype.as_shape().width +
+                 (n-1).bit_length())
+        p = [Signal(signed(width), name=f"p{k}") for k in range(n)]
 
-                    # update write and stride_i offsets.
-                    with m.If(stride_i_pos == (self.stride_i - 1)):
-                        m.d.sync += stride_i_pos.eq(0)
-                        with m.If(w_pos == (n//self.stride_i - 1)):
-                            m.d.sync += w_pos.eq(0)
-                        with m.Else():
-                            m.d.sync += w_pos.eq(w_pos+1)
-                    with m.Else():
-                        m.d.sync += stride_i_pos.eq(stride_i_pos+1)
+        ce, take = self._pipe(m, 1)
 
-                    # update stride_o index
-                    with m.If(stride_o_pos == (self.stride_o - 1)):
-                        m.d.sync += stride_o_pos.eq(0)
-                    with m.Else():
-                        m.d.sync += stride_o_pos.eq(stride_o_pos + 1)
+        x = self.i.payload.as_value()
+        with m.If(take):
+            for k in range(n):
+                partial = p[k+1] if k + 1 < n else 0
+                m.d.sync += p[k].eq(partial + x*taps_q[k] if taps_q[k] else partial)
 
-                    m.next = 'WAIT-VALID'
+        y = Signal(self.atype)
+        m.d.comb += [
+            y.as_value().eq(p[0] >> self.ttype.f_bits),
+            self.o.payload.eq(y.saturate(self.shape)),
+        ]
 
         return m
+
+    def _pipe(self, m, n_stages):
+        """
+        Flow control for the fully unrolled backends, which accept a sample
+        every cycle. Every one of the :py:`n_stages` pipeline stages advances
+        together whenever the output is not stalled. Returns :py:`(ce, take)`,
+        where :py:`take` is asserted when an input sample is accepted.
+        """
+        valid = Signal(n_stages)
+        ce    = Signal()
+        take  = Signal()
+        m.d.comb += [
+            ce.eq(~valid[-1] | self.o.ready),
+            take.eq(ce & self.i.valid),
+            self.i.ready.eq(ce),
+            self.o.valid.eq(valid[-1]),
+        ]
+
+        # Outputs discarded by 'stride_o' are never marked valid.
+        stride_o_pos = Signal(range(self.stride_o), init=0)
+
+        with m.If(ce):
+            m.d.sync += valid.eq(Cat(self.i.valid & (stride_o_pos == 0), valid[:-1]))
+        with m.If(take):
+            with m.If(stride_o_pos == (self.stride_o - 1)):
+                m.d.sync += stride_o_pos.eq(0)
+            with m.Else():
+                m.d.sync += stride_o_pos.eq(stride_o_pos + 1)
+
+        return ce, take
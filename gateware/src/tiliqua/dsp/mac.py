@@ -10,7 +10,7 @@ essential. Without sharing DSP tiles, multipliers are often the first
 FPGA resource to be exhausted.
 
 This file provides mechanisms for sharing DSP tiles (multipliers)
-amongst multiple components using 2 different strategies:
+amongst multiple components using 3 different strategies:
 
     1) :py:`MuxMAC`: One DSP tile is time multiplexed. Latency relatively
        low, however sharing >3x MACs quickly blows up resource usage.
@@ -20,18 +20,26 @@ amongst multiple components using 2 different strategies:
        On each ring, there is a single DSP tile processing multiplies. DSP tile
        throughput of near 100% is still achievable, however latency is higher.
 
+    3) :py:`ArbiterMAC`: Round-robin arbitration. Multiple components request
+       multiplies from a single DSP tile, which serves one requester per clock.
+       Latency is low (a requester waits at most one clock per other requester),
+       however the operand mux grows with the number of components.
+
 """
 
 from amaranth import *
 from amaranth.lib import data, enum, wiring
+from amaranth.lib.memory import Memory
 from amaranth.lib.wiring import In, Out
 from amaranth.utils import exact_log2
 
 from dataclasses import dataclass
+from functools import partial
 
 from amaranth_future import fixed
 
 from . import ASQ
+from .misc import naf
 from .. import ringnoc
 
 # Maximum multiplier argument for native 18-bit multipliers..
@@ -39,6 +47,14 @@ SQNative = fixed.SQ(3, ASQ.f_bits)
 # Maximum multiplier result for native 18-bit multipliers.
 SQRNative = fixed.SQ(SQNative.i_bits*2, SQNative.f_bits*2)
 
+@dataclass
+class MACStats:
+    """Elaboration-time count of multiplies issued to a :py:`MAC`."""
+    # Call sites of :py:`MAC.Multiply` (and its variants), using the multiplier.
+    multiply: int = 0
+    # Call sites of :py:`MAC.MultiplyConst`, implemented without a multiplier.
+    multiply_const: int = 0
+
 class MAC(wiring.Component):
 
     """
@@ -46,25 +62,60 @@ class MAC(wiring.Component):
 
     Users of this component perform multiplications using :py:`MAC.Multiply(m, ...)`,
     which may have different latency depending on the concrete strategy.
+
+    Providers should only clock their registers while :py:`strobe` is asserted.
+    Synthesis then maps :py:`strobe` onto the clock enables of the DSP tile
+    registers (CEA/CEB/CEP), such that nothing toggles between multiplies.
+
+    If :py:`dual` is set, the provider also accepts a second operand :py:`a1`,
+    such that :py:`MAC.MultiplyDual(m, ...)` computes 2 products sharing
+    the same :py:`b` in a single multiply (see :py:`dual_multiply`).
+
+    If :py:`accumulate` is set, the provider also accepts an :py:`accumulate`
+    flag, such that :py:`MAC.MultiplyAccumulate(m, ...)` adds the product to
+    the previous result of this MAC, rather than returning it alone.
+
+    If :py:`preadd` is set, the provider also accepts a :py:`d` operand which
+    is added to :py:`a` before the multiply (the pre-adder of a DSP tile),
+    see :py:`MAC.MultiplyPreadd`.
+
+    If :py:`postadd` is set, the provider also accepts a :py:`c` operand which
+    is added to the product (the post-adder of a DSP tile), see
+    :py:`MAC.MultiplyAdd`.
+
+    Multiplies by a constant may instead use :py:`MAC.MultiplyConst`, which
+    uses only adders. How many of each are used is tracked in :py:`stats`.
     """
 
     @staticmethod
-    def operands_layout(mtype):
+    def operands_layout(mtype, dual=False, accumulate=False, preadd=False, postadd=False):
         return data.StructLayout({
             "a": mtype,
             "b": mtype,
-        })
+        } | ({"a1": mtype} if dual else {}) |
+            ({"accumulate": unsigned(1)} if accumulate else {}) |
+            ({"d": mtype} if preadd else {}) |
+            ({"c": mtype} if postadd else {}))
 
     @staticmethod
-    def result_layout(mtype):
+    def result_layout(mtype, dual=False):
+        ztype = fixed.SQ(mtype.i_bits*2, mtype.f_bits*2)
         return data.StructLayout({
-            "z": fixed.SQ(mtype.i_bits*2, mtype.f_bits*2),
-        })
-
-    def __init__(self, mtype = SQNative, attrs={}):
+            "z": ztype,
+        } | ({"z1": ztype} if dual else {}))
+
+    def __init__(self, mtype = SQNative, attrs={}, dual=False, accumulate=False, preadd=False,
+                 postadd=False):
+        assert not (dual and (accumulate or preadd or postadd)), \
+            "dual MACs cannot be combined with accumulate, preadd or postadd"
+        self.dual = dual
+        self.accumulate = accumulate
+        self.preadd = preadd
+        self.postadd = postadd
+        self.stats = MACStats()
         super().__init__({
-            "operands": In(MAC.operands_layout(mtype)),
-            "result": Out(MAC.result_layout(mtype)),
+            "operands": In(MAC.operands_layout(mtype, dual, accumulate, preadd, postadd)),
+            "result": Out(MAC.result_layout(mtype, dual)),
             # Assert strobe when operands are valid. Keep operands
             # valid and strobe asserted until `valid` is strobed,
             # at which point result can be considered valid.
@@ -97,15 +148,115 @@ class MAC(wiring.Component):
                         m.next = 'DONE'
                 # ... some more states ...
         """
+        self.stats.multiply += 1
         for name, value in operands.items():
             m.d.comb += getattr(self.operands, name).eq(value)
         m.d.comb += self.strobe.eq(1)
         return m.If(self.valid)
 
+    def MultiplyDual(self, m, a0, a1, b):
+        """
+        Compute ``z = a0*b`` and ``z1 = a1*b`` with a single request,
+        returning a context object which is active in the same clock that
+        both answers are available on ``self.result``. Requires a :py:`dual`
+        MAC provider.
+        """
+        assert self.dual, "MultiplyDual requires a MAC provider with dual=True"
+        return self.Multiply(m, a=a0, a1=a1, b=b)
+
+    def MultiplyAccumulate(self, m, a, b, accumulate):
+        """
+        Compute ``z = a*b``, or ``z = z_prev + a*b`` if :py:`accumulate` is
+        asserted, where ``z_prev`` is the result of the previous multiply
+        issued to this MAC. A sum of products ``a₀b₀ + a₁b₁ + ...`` is then
+        a sequence of multiplies with only the first one not accumulating,
+        without any adders outside the MAC provider. Sums wrap at the
+        width of ``z``. Requires an :py:`accumulate` MAC provider.
+        """
+        assert self.accumulate, "MultiplyAccumulate requires a MAC provider with accumulate=True"
+        return self.Multiply(m, a=a, b=b, accumulate=accumulate)
+
+    def MultiplyPreadd(self, m, a, d, b):
+        """
+        Compute ``z = (a+d)*b`` with a single multiply, for example the
+        symmetric tap pairs of a linear-phase FIR. ``a+d`` must still be
+        representable by the operand type. Requires a :py:`preadd` MAC provider.
+        """
+        assert self.preadd, "MultiplyPreadd requires a MAC provider with preadd=True"
+        return self.Multiply(m, a=a, d=d, b=b)
+
+    def MultiplyAdd(self, m, a, b, c):
+        """
+        Compute ``z = a*b + c`` with a single request, for example a filter
+        state update ``y + f*x``, without an adder outside the MAC provider.
+        Requires a :py:`postadd` MAC provider.
+        """
+        assert self.postadd, "MultiplyAdd requires a MAC provider with postadd=True"
+        return self.Multiply(m, a=a, b=b, c=c)
+
+    def MultiplyConst(self, a, b):
+        """
+        Return ``a*b`` for a constant :py:`a` (a :py:`fixed.Const`), computed
+        with adders only (see :py:`const_multiply`). This is available in the
+        same clock, and uses neither the multiplier nor any bus or ring
+        bandwidth of this MAC provider.
+        """
+        self.stats.multiply_const += 1
+        return const_multiply(a, b)
+
     def default():
         """Default MAC provider for DSP components if None is specified."""
         return MuxMAC()
 
+def dual_multiply(operands):
+    """
+    Compute both :py:`a*b` and :py:`a1*b` of dual :py:`operands` with
+    a single (wider) multiplier, returning the raw result bits.
+
+    Both :py:`a` operands are packed into one, far enough apart that the
+    products cannot overlap: :py:`(a1*2**w + a)*b = a1*b*2**w + a*b`. The
+    low :py:`w` bits are then exactly :py:`a*b`, and the high bits are
+    :py:`a1*b`, after correcting for the borrow of a negative :py:`a*b`.
+    """
+    a  = operands.a.as_value()
+    a1 = operands.a1.as_value()
+    b  = operands.b.as_value()
+    w  = len(a) + len(b)
+    p  = ((a1 << w) + a) * b
+    z  = p[:w].as_signed()
+    z1 = p[w:].as_signed() + p[w-1]
+    return Cat(z, z1[:w])
+
+def const_multiply(a, b):
+    """
+    :py:`a*b` for a constant :py:`a`, as a sum of shifted copies of
+    :py:`b` given by the canonical signed digits of :py:`a`, such that
+    no multiplier is needed. Results are identical to a multiplier.
+    """
+    c, _ = a.as_integer_ratio()
+    terms = [
+        -(b.as_value() << p) if d < 0 else b.as_value() << p
+        for p, d in enumerate(naf(c)) if d
+    ]
+    # Start from a (free) zero as wide as a multiplier result, so the
+    # result always has the full integer bits, even for tiny constants.
+    product = sum(terms, C(0, signed(len(a.as_value()) + len(b.as_value()))))
+    return fixed.Value.cast(product, a.f_bits + b.f_bits)
+
+def multiply(operands):
+    """
+    Raw result bits of a multiply request with :py:`operands` of any
+    :py:`MAC.operands_layout`, for MAC providers containing a multiplier.
+    """
+    fields = dict(operands.shape())
+    if "a1" in fields:
+        return dual_multiply(operands)
+    a = operands.a + operands.d if "d" in fields else operands.a
+    z = a * operands.b
+    if "c" in fields:
+        z = z + operands.c
+    return z.as_value()
+
 class MuxMAC(MAC):
 
     """
@@ -123,14 +274,85 @@ class MuxMAC(MAC):
 
     When sharing amongst lots of cores, the required multiplexer
     size can quickly become unusably large.
+
+    By default, the multiplier is purely combinatorial and results are
+    valid in the same clock. For higher Fmax, :py:`pipeline_stages` adds
+    registers matching those found inside most DSP tiles, at the cost of
+    the same number of clocks of latency for every multiply.
     """
 
+    def __init__(self, mtype=SQNative, attrs={}, pipeline_stages=0, dual=False,
+                 preadd=False, accumulate=False, postadd=False):
+        """
+        mtype : fixed.SQ
+            Shape of multiplier operands. For operands of at most 9 bits
+            (for example :py:`fixed.SQ(1, 8)`), the multiplier maps onto a
+            9x9 multiplier, of which a DSP tile has twice as many as 18x18.
+        attrs : dict
+            Additional members of the component signature.
+        pipeline_stages : int
+            0 for a combinatorial multiplier. 1 registers the product (the
+            P register of a DSP tile). 2 also registers the operands (the
+            A/B registers of a DSP tile).
+        dual : bool
+            Accept a second :py:`a1` operand, see :py:`MAC.MultiplyDual`.
+        preadd : bool
+            Accept a :py:`d` operand, see :py:`MAC.MultiplyPreadd`.
+        accumulate : bool
+            Keep an accumulator, see :py:`MAC.MultiplyAccumulate`.
+        postadd : bool
+            Accept a :py:`c` operand, see :py:`MAC.MultiplyAdd`.
+        """
+        assert pipeline_stages in range(3)
+        self.pipeline_stages = pipeline_stages
+        super().__init__(mtype, attrs, dual=dual, preadd=preadd, accumulate=accumulate,
+                         postadd=postadd)
+
     def elaborate(self, platform):
         m = Module()
-        m.d.comb += [
-            self.result.z.eq(self.operands.a * self.operands.b),
-            self.valid.eq(1),
-        ]
+
+        # Result of the last multiply, only updated once it is 'valid', so
+        # pipeline stages may recompute a result any number of times.
+        if self.accumulate:
+            acc = Signal.like(self.result.z)
+            with m.If(self.strobe & self.valid):
+                m.d.sync += acc.eq(self.result.z)
+
+        def mac(operands):
+            if self.accumulate:
+                return multiply(operands) + Mux(operands.accumulate, acc.as_value(), 0)
+            return multiply(operands)
+
+        if self.pipeline_stages == 0:
+            m.d.comb += [
+                self.result.eq(mac(self.operands)),
+                self.valid.eq(1),
+            ]
+            return m
+
+        # All registers are only clocked while a multiply is requested, so
+        # 'strobe' maps onto the clock enables of the DSP tile registers
+        # and they do not toggle while the multiplier is idle.
+        if self.pipeline_stages == 2:
+            operands = Signal.like(self.operands)
+            with m.If(self.strobe):
+                m.d.sync += operands.eq(self.operands)
+        else:
+            operands = self.operands
+
+        with m.If(self.strobe):
+            m.d.sync += self.result.eq(mac(operands))
+
+        # Clocks the current operands have been held for. Operands are
+        # held until 'valid', after which the pipeline restarts for the
+        # next multiply (so no stale products are ever marked valid).
+        busy = Signal(self.pipeline_stages)
+        m.d.comb += self.valid.eq(self.strobe & busy[-1])
+        with m.If(self.valid | ~self.strobe):
+            m.d.sync += busy.eq(0)
+        with m.Else():
+            m.d.sync += busy.eq(Cat(1, busy[:-1]))
+
         return m
 
 class RingMAC(MAC):
@@ -192,35 +414,93 @@ class RingMAC(MAC):
     instantiated inside this :py:`RingMAC`. If you are careful to only
     use :py:`RingMACServer.new_client()` to create these, all of
     these assumptions will be held.
+
+    If :py:`mtype` is wider than the operands on the ring, operands are
+    sent as a narrower mantissa (see :py:`RingMACServer` ``mantissa_bits``).
     """
 
-    def __init__(self, tag: int, cfg: ringnoc.Config):
+    def __init__(self, tag: int, cfg: ringnoc.Config, mtype=None):
         self.tag = tag
-        self.ring_client = ringnoc.Client(cfg)
-        mtype = cfg.payload_type_client["a"].shape
+        self.ring_client = ringnoc.Client(cfg, tag=tag)
+        self.ring_mtype = cfg.payload_type_client["a"].shape
+        mtype = mtype or self.ring_mtype
+        dual = "a1" in dict(cfg.payload_type_client)
+        accumulate = "accumulate" in dict(cfg.payload_type_client)
+        preadd = "d" in dict(cfg.payload_type_client)
+        postadd = "c" in dict(cfg.payload_type_client)
         super().__init__(mtype=mtype, attrs={
             "ring": Out(ringnoc.NodeSignature(cfg)),
-        })
+        }, dual=dual, accumulate=accumulate, preadd=preadd, postadd=postadd)
 
     def elaborate(self, platform):
         m = Module()
 
-        # TODO: assert self.tag < self.ring.signature.tag_bits
-
         m.submodules.ring_client = self.ring_client
         wiring.connect(m, wiring.flipped(self.ring), self.ring_client.ring)
 
+        # Products with a zero operand are answered in the same clock, without
+        # a round trip on the ring. Not for accumulating MACs, as the server
+        # must see every request to keep its accumulator up to date.
+        zero = Signal()
+        if not self.accumulate:
+            m.d.comb += zero.eq(self._zero_product())
+
         m.d.comb += [
-            self.ring_client.tag.eq(self.tag),
-            self.ring_client.i.eq(self.operands),
-            self.ring_client.strobe.eq(self.strobe),
-            self.result.eq(self.ring_client.o),
-            self.valid.eq(self.ring_client.valid),
+            self.ring_client.strobe.eq(self.strobe & ~zero),
+            self.valid.eq(self.ring_client.valid | (self.strobe & zero)),
         ]
 
+        if self.ring_mtype.as_shape().width == self.operands.a.shape().as_shape().width:
+            m.d.comb += [
+                self.ring_client.i.eq(self.operands),
+                self.result.eq(self.ring_client.o),
+            ]
+        else:
+            self._connect_mantissa(m)
+
+        with m.If(zero):
+            m.d.comb += self.result.eq(0)
+            if self.postadd:
+                m.d.comb += self.result.z.eq(self.operands.c)
+
         return m
 
-def RingMACServer(max_clients=16, mtype=SQNative):
+    def _zero_product(self):
+        operands = self.operands
+        a = operands.a + operands.d if self.preadd else operands.a
+        a_zero = a.as_value() == 0
+        if self.dual:
+            a_zero &= operands.a1.as_value() == 0
+        return a_zero | (operands.b.as_value() == 0)
+
+    def _connect_mantissa(self, m):
+        mantissa_bits = self.ring_mtype.as_shape().width
+        operand_bits = self.operands.a.shape().as_shape().width
+
+        # Send each operand as its top 'mantissa_bits' significant bits, and
+        # scale the product back up by the discarded bits on arrival. The
+        # operands are held until 'valid', so the shifts never need to
+        # travel on the ring.
+        shifts = []
+        for name in ["a", "b"]:
+            value = getattr(self.operands, name).as_value()
+            shift = Signal(range(operand_bits - mantissa_bits + 1), name=f"shift_{name}")
+            # Smallest shift such that the bits above the mantissa are
+            # all copies of the sign bit (assigned last wins).
+            for k in reversed(range(operand_bits - mantissa_bits + 1)):
+                top = value[mantissa_bits-1+k:]
+                with m.If(top.all() | ~top.any()):
+                    m.d.comb += shift.eq(k)
+            m.d.comb += getattr(self.ring_client.i, name).as_value().eq(
+                (value >> shift)[:mantissa_bits])
+            shifts.append(shift)
+
+        m.d.comb += self.result.z.as_value().eq(
+            self.ring_client.o.z.as_value() << (shifts[0] + shifts[1]))
+
+def RingMACServer(max_clients=16, mtype=SQNative, pipeline=False, dual=False,
+                  accumulate=False, preadd=False, postadd=False, n_rings=1,
+                  mantissa_bits=None):
     """
     Factory for creating a MAC message ring.
 
@@ -228,15 +508,184 @@ def RingMACServer(max_clients=16, mtype=SQNative):
     add additional client nodes to this ring. During elaboration, all clients (and this server) are connected in
     a ring, and a single shared DSP tile is instantiated to serve requests.
 
+    If :py:`pipeline` is set, operands are registered at the server before the
+    multiply, so both the input and output registers of the DSP tile are used,
+    at the cost of 1 extra clock of latency per multiply.
+
+    If :py:`dual` is set, every client may request 2 products sharing the
+    same :py:`b` in a single message using :py:`MAC.MultiplyDual`, which are
+    both computed by the server's multiplier in the same clock.
+
+    If :py:`accumulate` is set, the server keeps one accumulator per client
+    (indexed by its ring tag), so clients may compute sums of products with
+    :py:`MAC.MultiplyAccumulate`, where the additions happen in the server
+    (the post-adder of the DSP tile) rather than in every client.
+
+    If :py:`preadd` is set, clients may also request ``(a+d)*b`` using
+    :py:`MAC.MultiplyPreadd`, where the addition happens in the server
+    (the pre-adder of the DSP tile). Likewise, if :py:`postadd` is set,
+    clients may request ``a*b + c`` using :py:`MAC.MultiplyAdd`.
+
+    If :py:`n_rings` is greater than 1, clients are split amongst that many
+    shorter rings which all share the same DSP tile, reducing latency when
+    there are many clients (see :py:`ringnoc.Server`).
+
+    If :py:`mantissa_bits` is set, operands and results are carried on the
+    ring with reduced precision to save flip-flops in every ring node. Each
+    client sends only the top :py:`mantissa_bits` significant bits of each
+    operand, and shifts the (narrower) product back into place. Small operands
+    are still exact, larger ones lose LSBs, much like a floating point mantissa.
+    This is only supported for plain multiplies.
+
     Returns:
         ringnoc.Server configured for DSP tile sharing of ``operands.a * operands.b``.
     """
+    assert not (dual and (accumulate or preadd or postadd)), \
+        "dual MACs cannot be combined with accumulate, preadd or postadd"
+    assert mantissa_bits is None or not (dual or accumulate or preadd or postadd), \
+        "mantissa_bits is only supported for plain multiplies"
+
+    # Operand type as carried on the ring.
+    ring_mtype = mtype
+    if mantissa_bits is not None:
+        assert mtype.i_bits < mantissa_bits <= mtype.as_shape().width
+        ring_mtype = fixed.SQ(mtype.i_bits, mantissa_bits - mtype.i_bits)
+    ztype = MAC.result_layout(ring_mtype)["z"].shape
+
+    def process_request(m, operands, tag):
+        z = multiply(operands)
+        if not accumulate:
+            return z
+        # Last result of every client (asynchronous read for distributed RAM).
+        m.submodules.acc_mem = acc_mem = Memory(shape=ztype, depth=max_clients, init=[])
+        rport = acc_mem.read_port(domain="comb")
+        wport = acc_mem.write_port()
+        acc = Signal(ztype.as_shape())
+        with m.If(operands.accumulate):
+            m.d.comb += acc.eq(z + rport.data.as_value())
+        with m.Else():
+            m.d.comb += acc.eq(z)
+        m.d.comb += [
+            rport.addr.eq(tag),
+            wport.addr.eq(tag),
+            wport.data.as_value().eq(acc),
+            wport.en.eq(1),
+        ]
+        return acc
+
     return ringnoc.Server(
         cfg=ringnoc.Config(
             tag_bits=exact_log2(max_clients),
-            payload_type_client=MAC.operands_layout(mtype),
-            payload_type_server=MAC.result_layout(mtype),
+            payload_type_client=MAC.operands_layout(ring_mtype, dual, accumulate, preadd, postadd),
+            payload_type_server=MAC.result_layout(ring_mtype, dual),
         ),
-        process_request=lambda m, operands: operands.a * operands.b,
-        client_class=RingMAC,
+        process_request=process_request,
+        client_class=partial(RingMAC, mtype=mtype),
+        pipeline=pipeline,
+        n_rings=n_rings,
     )
+
+class ArbiterMAC(MAC):
+
+    """
+    An arbitrated multiplication provider, where a DSP tile is
+    shared between many components.
+
+    Contains no multiplier. :py:`bus` must be hooked up to an
+    :py:`ArbiterMACServer`, which routes the product back to
+    the client it was granted to. As for :py:`RingMAC`, these
+    should only be created using :py:`ArbiterMACServer.new_client()`,
+    and must be added as a submodule for elaboration by the user.
+    """
+
+    @staticmethod
+    def bus_signature(mtype):
+        return wiring.Signature({
+            "operands": Out(MAC.operands_layout(mtype)),
+            "strobe":   Out(1),
+            "result":   In(MAC.result_layout(mtype)),
+            "valid":    In(1),
+        })
+
+    def __init__(self, tag: int, mtype=SQNative):
+        self.tag = tag
+        super().__init__(mtype=mtype, attrs={
+            "bus": Out(ArbiterMAC.bus_signature(mtype)),
+        })
+
+    def elaborate(self, platform):
+        m = Module()
+        m.d.comb += [
+            self.bus.operands.eq(self.operands),
+            self.bus.strobe.eq(self.strobe),
+            self.result.eq(self.bus.result),
+            self.valid.eq(self.bus.valid),
+        ]
+        return m
+
+class ArbiterMACServer(wiring.Component):
+
+    """
+    Shares a single DSP tile between all clients created with
+    :py:`ArbiterMACServer.new_client()`.
+
+    One pending request is served per clock. The grant rotates
+    round-robin amongst clients with pending requests, so each
+    client waits at most one clock for every other client that
+    is also waiting for a multiply.
+
+    .. code-block:: text
+
+        client₀ a*b ───►│                ├───► valid₀
+        client₁ a*b ───►├──►[DSP Tile]──►┼───► valid₁
+        client₂ a*b ───►│       ▲        ├───► valid₂
+                       mux      │      (tag)
+                              grant
+    """
+
+    def __init__(self, max_clients=16, mtype=SQNative):
+        self.max_clients = max_clients
+        self.mtype = mtype
+        self.clients = []
+        super().__init__({})
+
+    def new_client(self):
+        """Create and add a new client to this server."""
+        tag = len(self.clients)
+        assert len(self.clients) < self.max_clients
+        client = ArbiterMAC(tag=tag, mtype=self.mtype)
+        self.clients.append(client)
+        return client
+
+    def elaborate(self, platform):
+        m = Module()
+
+        assert len(self.clients) > 0, "ArbiterMACServer must have at least one client"
+
+        n = len(self.clients)
+        buses = [c.bus for c in self.clients]
+
+        grant = Signal(range(n))
+        operands = Signal(MAC.operands_layout(self.mtype))
+        result = Signal(MAC.result_layout(self.mtype))
+
+        m.d.comb += result.z.eq(operands.a * operands.b)
+
+        # Product is visible to all clients, only the granted one sees 'valid'.
+        for bus in buses:
+            m.d.comb += bus.result.eq(result)
+
+        with m.Switch(grant):
+            for g in range(n):
+                with m.Case(g):
+                    m.d.comb += [
+                        operands.eq(buses[g].operands),
+                        buses[g].valid.eq(buses[g].strobe),
+                    ]
+                    # Rotate the grant to the next client (after 'g') with a
+                    # pending request. Closest client wins (assigned last).
+                    for k in reversed(range(1, n)):
+                        with m.If(buses[(g + k) % n].strobe):
+                            m.d.sync += grant.eq((g + k) % n)
+
+        return m
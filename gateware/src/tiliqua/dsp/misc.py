@@ -3,7 +3,7 @@
 # SPDX-License-Identifier: CERN-OHL-S-2.0
 
 from amaranth import *
-from amaranth.lib import stream, wiring
+from amaranth.lib import data, stream, wiring
 from amaranth.lib.wiring import In, Out
 
 from . import ASQ, asq_from_volts
@@ -30,10 +30,28 @@ def named_submodules(m_submodules, elaboratables, override_name=None):
 
     TODO: is there an idiomatic way of doing this?
     """
-    if override_name is None:
-        [setattr(m_submodules, f"{type(e).__name__.lower()}{i}", e) for i, e in enumerate(elaboratables)]
-    else:
-        [setattr(m_submodules, f"{override_name}{i}", e) for i, e in enumerate(elaboratables)]
+    prefixes = {}
+    for i, e in enumerate(elaboratables):
+        if override_name is None:
+            prefix = prefixes.setdefault(type(e), type(e).__name__.lower())
+        else:
+            prefix = override_name
+        m_submodules[f"{prefix}{i}"] = e
+
+
+def naf(v):
+    """
+    Non-adjacent form (canonical signed digits) of integer :py:`v`, as a
+    list of digits in (-1, 0, 1), least significant first. No two adjacent
+    digits are nonzero, which minimizes the number of additions needed to
+    multiply by :py:`v` using only shifts and adds.
+    """
+    digits = []
+    while v:
+        d = (2 - (v % 4)) if v % 2 else 0
+        digits.append(d)
+        v = (v - d) // 2
+    return digits
 
 
 class GateDetector(wiring.Component):
@@ -93,11 +111,13 @@ class CountingFollower(wiring.Component):
         m = Module()
         m.d.comb += self.i.ready.eq(self.o.ready)
         m.d.comb += self.o.valid.eq(self.i.valid)
+        # One subtractor: its sign picks the step direction. The 2-bit step
+        # is built directly from (sign, nonzero): 0b01 = +1, 0b11 = -1, 0 = 0.
+        diff = Signal(signed(len(self.o.payload)+1))
+        m.d.comb += diff.eq(self.i.payload - self.o.payload)
+        step = Cat(diff.any(), diff[-1]).as_signed()
         with m.If(self.i.valid & self.o.ready):
-            with m.If(self.o.payload < self.i.payload):
-                m.d.sync += self.o.payload.eq(self.o.payload + 1)
-            with m.Elif(self.o.payload > self.i.payload):
-                m.d.sync += self.o.payload.eq(self.o.payload - 1)
+            m.d.sync += self.o.payload.eq(self.o.payload + step)
         return m
 
 
@@ -108,6 +128,11 @@ class Duplicate(wiring.Component):
     No filtering is performed - each input sample is simply repeated N times
     in the output stream.
 
+    For :py:`n_channels > 1`, payloads are a :py:`data.ArrayLayout` of that
+    many channels, which are all repeated together. This needs only a single
+    repeat counter and handshake, rather than one per channel as with
+    separate :py:`Duplicate` instances.
+
     Members
     -------
     i : :py:`In(stream.Signature(ASQ))`
@@ -116,30 +141,40 @@ class Duplicate(wiring.Component):
         Output stream producing each input sample N times.
     """
 
-    i: In(stream.Signature(ASQ))
-    o: Out(stream.Signature(ASQ))
-
-    def __init__(self, n: int):
+    def __init__(self, n: int, n_channels: int = 1):
         self.n = n
-        super().__init__()
+        self.n_channels = n_channels
+        shape = ASQ if n_channels == 1 else data.ArrayLayout(ASQ, n_channels)
+        super().__init__({
+            "i": In(stream.Signature(shape)),
+            "o": Out(stream.Signature(shape)),
+        })
 
     def elaborate(self, platform):
         m = Module()
 
         if self.n == 1:
-            wiring.connect(m, wiring.flipped(self.i), self.o)
+            wiring.connect(m, wiring.flipped(self.i), wiring.flipped(self.o))
         else:
-            output_count = Signal(range(self.n + 1), init=0)
-            current_sample = Signal(ASQ)
-            m.d.comb += self.i.ready.eq(output_count == 0)
-            m.d.comb += self.o.valid.eq(output_count > 0)
-            m.d.comb += self.o.payload.eq(current_sample)
+            # Number of repeats remaining, one-hot (bit k set = k repeats
+            # remaining), so counting down is a shift rather than a subtractor
+            # and comparator. The first copy of each sample is forwarded on the
+            # same cycle it is accepted.
+            remaining = Signal(self.n, init=1)
+            idle = remaining[0]
+            current_sample = Signal.like(self.i.payload)
+            m.d.comb += self.i.ready.eq(idle & self.o.ready)
+            m.d.comb += self.o.valid.eq(~idle | self.i.valid)
+            with m.If(idle):
+                m.d.comb += self.o.payload.eq(self.i.payload)
+            with m.Else():
+                m.d.comb += self.o.payload.eq(current_sample)
             with m.If(self.i.valid & self.i.ready):
                 m.d.sync += [
                     current_sample.eq(self.i.payload),
-                    output_count.eq(self.n),
+                    remaining.eq(1 << (self.n - 1)),
                 ]
-            with m.If(self.o.valid & self.o.ready):
-                m.d.sync += output_count.eq(output_count - 1)
+            with m.Elif(self.o.valid & self.o.ready):
+                m.d.sync += remaining.eq(remaining >> 1)
 
         return m
@@ -31,7 +31,7 @@ class MatrixMix(wiring.Component):
     or dynamically updated through gateware.
 
     A single multiplier is shared, where total latency is of the order
-    ``2*i_channels*o_channels`` from input to output.
+    ``i_channels*o_channels`` from input to output.
 
     All coefficients must fit inside the self.ctype declared below.
 
@@ -114,21 +114,40 @@ class MatrixMix(wiring.Component):
         wport = self.mem.write_port()
         rport = self.mem.read_port(transparent_for=(wport,))
 
+        # Latched input samples. The coefficient memory is laid out with
+        # input channels as the outer (slow) index, so every input sample
+        # is used for o_channels consecutive MACs. The latch is shifted
+        # down once per input channel, such that the multiplier is always
+        # fed from 'i_latch[0]' rather than a mux over all input channels.
         i_latch = Signal(data.ArrayLayout(self.ctype, self.i_channels))
-        o_accum = Signal(data.ArrayLayout(
-            mac.SQRNative, self.o_channels))
-
-        i_ch   = Signal(exact_log2(self.i_channels))
-        o_ch   = Signal(exact_log2(self.o_channels))
-        # i/o channel index, one cycle behind.
-        l_i_ch = Signal(exact_log2(self.i_channels))
-        o_ch_l = Signal(exact_log2(self.o_channels))
-        # we've finished all accumulation steps.
+
+        # accumulator for each output channel. The inner loop is over
+        # output channels, so each accumulator is read and written back
+        # once every o_channels cycles.
+        m.submodules.accum_mem = accum_mem = Memory(
+            shape=mac.SQRNative, depth=self.o_channels, init=[])
+        accum_wport = accum_mem.write_port()
+        accum_rport = accum_mem.read_port(transparent_for=(accum_wport,))
+
+        # coefficient index Cat(o_ch, i_ch) of the next coefficient read.
+        ix     = Signal(exact_log2(self.i_channels*self.o_channels))
+        # coefficient index of the current MAC, one cycle behind.
+        ix_l   = Signal.like(ix)
+        o_ch_l = ix_l[:exact_log2(self.o_channels)]
+        l_i_ch = ix_l[exact_log2(self.o_channels):]
+        # this is the last accumulation step.
         done = Signal(1)
+        # output channel index during readout, and one cycle behind.
+        ix_o   = Signal(range(self.o_channels))
+        ix_o_l = Signal(range(self.o_channels))
 
         m.d.comb += [
             rport.en.eq(1),
-            rport.addr.eq(Cat(o_ch, i_ch)),
+            rport.addr.eq(ix),
+            accum_rport.en.eq(1),
+            accum_rport.addr.eq(ix[:exact_log2(self.o_channels)]),
+            accum_wport.addr.eq(o_ch_l),
+            done.eq(ix_l == (self.i_channels*self.o_channels - 1)),
         ]
 
         read0 = Signal(self.ctype)
@@ -162,11 +181,14 @@ class MatrixMix(wiring.Component):
             with m.State('WAIT-VALID'):
                 m.d.comb += self.i.ready.eq(1),
                 with m.If(self.i.valid):
+                    # Issue the first coefficient read combinatorially.
+                    m.d.comb += [
+                        rport.addr.eq(0),
+                        accum_rport.addr.eq(0),
+                    ]
                     m.d.sync += [
-                        o_accum.eq(0),
-                        i_ch.eq(0),
-                        o_ch.eq(0),
-                        done.eq(0),
+                        ix.eq(1),
+                        ix_l.eq(0),
                     ]
                     # FIXME: assigning each element of the payload is necessary
                     # because assignment of a data.ArrayLayout ignores the
@@ -175,36 +197,48 @@ class MatrixMix(wiring.Component):
                         i_latch[n].eq(self.i.payload[n])
                         for n in range(self.i_channels)
                     ]
-                    m.next = 'NEXT'
-            with m.State('NEXT'):
-                m.next = 'MAC'
-                m.d.sync += [
-                    o_ch_l.eq(o_ch),
-                    l_i_ch.eq(i_ch),
-                ]
-                with m.If(o_ch == (self.o_channels - 1)):
-                    m.d.sync += o_ch.eq(0)
-                    with m.If(i_ch == (self.i_channels - 1)):
-                        m.d.sync += done.eq(1)
-                    with m.Else():
-                        m.d.sync += i_ch.eq(i_ch+1)
-                with m.Else():
-                    m.d.sync += o_ch.eq(o_ch+1)
+                    m.next = 'MAC'
             with m.State('MAC'):
-                m.next = 'NEXT'
+                # Accumulate the coefficient (and accumulator) read last
+                # cycle, while the next coefficient is read.
+                m.d.comb += accum_wport.en.eq(1)
+                with m.If(l_i_ch == 0):
+                    m.d.comb += accum_wport.data.eq(
+                        rport.data * i_latch[0])
+                with m.Else():
+                    m.d.comb += accum_wport.data.eq(
+                        accum_rport.data + (rport.data * i_latch[0]))
+                with m.If(o_ch_l == (self.o_channels - 1)):
+                    m.d.sync += [
+                        i_latch[n].eq(i_latch[n+1])
+                        for n in range(self.i_channels - 1)
+                    ]
                 m.d.sync += [
-                    o_accum[o_ch_l].eq(o_accum[o_ch_l] +
-                                       (rport.data *
-                                        i_latch[l_i_ch]))
+                    ix_l.eq(ix),
+                    ix.eq(ix+1),
                 ]
                 with m.If(done):
+                    # Issue the first accumulator readout.
+                    m.d.comb += accum_rport.addr.eq(0)
+                    m.d.sync += [
+                        ix_o.eq(1),
+                        ix_o_l.eq(0),
+                    ]
                     m.next = 'LATCH'
             with m.State('LATCH'):
+                # Read out accumulators into the output payload.
+                m.d.comb += accum_rport.addr.eq(ix_o)
                 m.d.sync += [
-                    self.o.payload[n].eq(o_accum[n].saturate(ASQ))
-                    for n in range(self.o_channels)
+                    ix_o.eq(ix_o+1),
+                    ix_o_l.eq(ix_o),
                 ]
-                m.next = 'WAIT-READY'
+                with m.Switch(ix_o_l):
+                    for n in range(self.o_channels):
+                        with m.Case(n):
+                            m.d.sync += self.o.payload[n].eq(
+                                accum_rport.data.saturate(ASQ))
+                with m.If(ix_o_l == (self.o_channels - 1)):
+                    m.next = 'WAIT-READY'
             with m.State('WAIT-READY'):
                 m.d.comb += [
                     self.o.valid.eq(1),
@@ -33,20 +33,25 @@ class Trigger(wiring.Component):
         m = Module()
 
         trigger = Signal()
-        l_sample = Signal(shape=self.shape)
+
+        # Sign of (previous sample - threshold). Only this bit of the
+        # previous sample is needed, so a single subtractor is used.
+        l_below = Signal()
 
         m.d.comb += [
             self.o.valid.eq(self.i.valid),
             self.i.ready.eq(self.o.ready),
         ]
 
+        # Differences are 1 bit wider than their operands, so the sign bit
+        # is the result of a signed comparison against `threshold`.
+        below = (self.i.payload.sample - self.i.payload.threshold).as_value()[-1]
+
         with m.If(self.i.valid & self.o.ready):
-            m.d.sync += l_sample.eq(self.i.payload.sample)
+            m.d.sync += l_below.eq(below)
             m.d.comb += [
-                self.o.payload.eq(
-                    (l_sample              < self.i.payload.threshold) &
-                    (self.i.payload.sample >= self.i.payload.threshold)
-                ),
+                # (previous sample < threshold) & (sample >= threshold)
+                self.o.payload.eq(l_below & ~below),
             ]
 
         return m
@@ -57,10 +62,17 @@ class Ramp(wiring.Component):
     """
     If trigger strobes a 1, ramps from -1 to 1, staying at 1 until retriggered.
     A retrigger mid-ramp does not restart the ramp until the output has reached 1.
+
+    The top of the ramp is detected from the top :py:`TOP_BITS` fractional bits
+    of the output, so the ramp stops once the output reaches :py:`1 - 2**-TOP_BITS`
+    (about 0.984), rather than exactly 1.
     """
 
     TIMEBASE_SQ = fixed.SQ(8, 24)
 
+    # Ramp is at the top once the output is in [1 - 2**-TOP_BITS, 1).
+    TOP_BITS = 6
+
     def __init__(self, shape=ASQ, shift=6):
         self.shape = shape
         self.shift = shift
@@ -83,8 +95,14 @@ class Ramp(wiring.Component):
             self.o.payload.eq(s >> self.shift),
         ]
 
+        # Output is at the top of the ramp (in [1 - 2**-TOP_BITS, 1)): all
+        # integer bits clear and the top TOP_BITS fractional bits set. This
+        # only needs an AND of the top bits, rather than a full compare.
+        top = self.o.payload.as_value()[self.shape.f_bits - self.TOP_BITS:]
+        at_max = top == (1 << self.TOP_BITS) - 1
+
         with m.If(self.i.valid & self.o.ready):
-            with m.If(self.o.payload > fixed.Const(0.985, shape=self.shape)):
+            with m.If(at_max):
                 with m.If(self.i.payload.trigger):
                     m.d.sync += s.eq(fixed.Const(-1.0, shape=self.shape, clamp=True) << self.shift)
             with m.Else():
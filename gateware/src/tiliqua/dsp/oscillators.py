@@ -2,6 +2,9 @@
 #
 # SPDX-License-Identifier: CERN-OHL-S-2.0
 
+import math
+from functools import cache
+
 from amaranth import *
 from amaranth.lib import data, stream, wiring
 from amaranth.lib.wiring import In, Out
@@ -45,14 +48,16 @@ class SawNCO(wiring.Component):
 
         s = Signal(fixed.SQ(self.extra_bits, ASQ.f_bits))
 
-        out_no_phase_mod = Signal(ASQ)
-
+        # The output is 's >> shift' wrapped to ASQ, plus the phase offset. As
+        # the output wraps anyway, only the ASQ-wide slice of 's' that is
+        # visible after the shift needs to be added to the phase offset.
+        w = ASQ.as_shape().width
         m.d.comb += [
             self.o.valid.eq(self.i.valid),
             self.i.ready.eq(self.o.ready),
-            out_no_phase_mod.eq(s >> self.shift),
-            self.o.payload.eq(
-                out_no_phase_mod + self.i.payload.phase),
+            self.o.payload.as_value().eq(
+                s.as_value()[self.shift:self.shift+w] +
+                self.i.payload.phase.as_value()),
         ]
 
         with m.If(self.i.valid & self.o.ready):
@@ -63,9 +68,12 @@ class SawNCO(wiring.Component):
 class WhiteNoise(wiring.Component):
 
     """
-    Simple white noise generator based on an LFSR.
+    Simple white noise generator based on xoshiro128++.
 
-    See: https://www.musicdsp.org/en/latest/Synthesis/216-fast-whitenoise-generator.html
+    Uses only adds, XORs, shifts and rotates (no multipliers), and produces
+    a new sample every clock. The generator state is seeded by SplitMix64.
+
+    See: https://prng.di.unimi.it/xoshiro128plusplus.c
 
     Members
     -------
@@ -75,41 +83,69 @@ class WhiteNoise(wiring.Component):
 
     o: Out(stream.Signature(ASQ))
 
+    # SplitMix64(0), first 2 outputs as 4 (low, high) 32-bit words.
+    SEEDS = [0x7b1dcdaf, 0xe220a839, 0xa1b965f4, 0x6e789e6a]
+
     def elaborate(self, platform):
         m = Module()
 
-        x0 = Signal(unsigned(32), init=0x67452301)
-        x1 = Signal(unsigned(32), init=0xefcdab89)
+        def rotl(x, k):
+            return Cat(x[32-k:], x[:32-k])
 
+        s = [Signal(unsigned(32), init=seed, name=f"s{n}")
+             for n, seed in enumerate(self.SEEDS)]
+
+        result = Signal(unsigned(32))
         m.d.comb += [
-            self.o.payload.as_value().eq(x1>>(ASQ.f_bits+ASQ.i_bits)),
+            self.o.valid.eq(1),
+            result.eq(rotl((s[0] + s[3])[:32], 7) + s[0]),
+            self.o.payload.as_value().eq(result>>(ASQ.f_bits+ASQ.i_bits)),
         ]
 
-        with m.FSM() as fsm:
-            with m.State('X'):
-                m.d.sync += x1.eq(x1+x0)
-                m.next = 'OUT'
-            with m.State('OUT'):
-                m.d.comb += self.o.valid.eq(1),
-                with m.If(self.o.ready):
-                    m.d.sync += x0.eq(x0^x1)
-                    m.next = 'X'
+        s2 = s[2] ^ s[0]
+        s3 = s[3] ^ s[1]
+        with m.If(self.o.ready):
+            m.d.sync += [
+                s[0].eq(s[0] ^ s3),
+                s[1].eq(s[1] ^ s2),
+                s[2].eq(s2 ^ (s[1] << 9)[:32]),
+                s[3].eq(rotl(s3, 11)),
+            ]
 
         return m
 
+@cache
+def _dwo_coefficient(c, i_bits, f_bits):
+    """'Magic circle' coefficient ``e = 2*sin(pi*f/fs)`` given ``c = cos(2*pi*f/fs)``."""
+    return fixed.Const(math.sqrt(2*(1 - c)), shape=fixed.SQ(i_bits, f_bits))
+
 class DWO(wiring.Component):
 
     """
-    Digital Waveguide Oscillator.
+    Fixed-frequency sine oscillator ('magic circle' recursion).
 
     Emits a fixed frequency and amplitude sine wave, without needing
-    a sine LUT. Instead, only uses 2 registers, 1 multiply, 3 adds.
+    a sine LUT. Instead, only uses 2 registers, 2 (sequential) multiplies
+    on 1 multiplier, and 2 adds, updating:
+
+    .. code-block:: text
+
+        x = x - e*y
+        y = y + e*x  (using the new x)
+
+    where ``e = 2*sin(pi*f/fs)``. The update matrix has a determinant of
+    exactly 1 regardless of how ``e`` is quantized, so the amplitude does
+    not drift over time (unlike a single-coefficient waveguide, whose
+    amplitude depends on rounding of the multiply).
 
     This is not easy to modulate, but it is an interesting way to
     achieve a high-fidelity sine wave with minimal resources.
 
-    For details, see Fig. 3 from:
-        https://ccrma.stanford.edu/~jos/wgo/Second_Order_Waveguide_Filter.html
+    Each product is registered before it is added, so that the adds
+    are not in the same path as the multiply.
+
+    For details, see 'Coupled Form' and 'Magic Circle' in:
+        https://ccrma.stanford.edu/~jos/pasp/Digital_Sinusoid_Generators.html
 
     Members
     -------
@@ -122,7 +158,7 @@ class DWO(wiring.Component):
     def __init__(self, sq=None, macp=None, c=0.99):
         """
         sq : fixed.SQ
-            Fixed-point type of internal waveguide calculations.
+            Fixed-point type of internal oscillator calculations.
         macp : mac.MAC
             (optional) shared multiplier provider.
         c : float
@@ -140,27 +176,40 @@ class DWO(wiring.Component):
 
         m.submodules.macp = mp = self.macp
 
-        C = fixed.Const(self.c, shape=sq)
+        E = _dwo_coefficient(self.c, sq.i_bits, sq.f_bits)
 
         # Initial conditions (determines output amplitude)
-        x1 = Signal(sq, init=fixed.Const(0.0, shape=sq))
-        x2 = Signal(sq, init=fixed.Const(0.5, shape=sq))
+        x = Signal(sq, init=fixed.Const(0.5, shape=sq))
+        y = Signal(sq, init=fixed.Const(0.0, shape=sq))
 
-        # x2 -> Output
-        m.d.comb += self.o.payload.eq(x2),
+        # Registered multiplier output
+        z = Signal.like(mp.result.z)
+
+        # x -> Output
+        m.d.comb += self.o.payload.eq(x),
 
         with m.FSM() as fsm:
-            with m.State('MAC'):
-                with mp.Multiply(m, a=(x1+x2), b=C):
-                    m.d.sync += [
-                        x1.eq(mp.result.z - x2),
-                        x2.eq(mp.result.z + x1),
-                    ]
-                    m.next = 'WAIT-READY'
+            with m.State('MAC-Y'):
+                with mp.Multiply(m, a=y, b=E):
+                    m.d.sync += z.eq(mp.result.z)
+                    m.next = 'UPDATE-X'
+
+            with m.State('UPDATE-X'):
+                m.d.sync += x.eq(x - z)
+                m.next = 'MAC-X'
+
+            with m.State('MAC-X'):
+                with mp.Multiply(m, a=x, b=E):
+                    m.d.sync += z.eq(mp.result.z)
+                    m.next = 'UPDATE-Y'
+
+            with m.State('UPDATE-Y'):
+                m.d.sync += y.eq(y + z)
+                m.next = 'WAIT-READY'
 
             with m.State('WAIT-READY'):
                 m.d.comb += self.o.valid.eq(1)
                 with m.If(self.o.ready):
-                    m.next = 'MAC'
+                    m.next = 'MAC-Y'
 
         return m
@@ -3,13 +3,30 @@
 # SPDX-License-Identifier: CERN-OHL-S-2.0
 
 import math
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
 
 from amaranth import *
 from amaranth.lib import stream, wiring
 from amaranth.lib.wiring import In, Out
+from scipy import signal
 
 from . import ASQ
 from .filters import FIR
+from .misc import named_submodules
+
+
+@lru_cache
+def _design_taps(fs, cutoff, filter_order):
+    """
+    Lowpass filter design (before prescaling) for a :py:`Resample` with the
+    given parameters. Filter design is slow, and multi-channel designs often
+    have many identical resamplers, so designs are memoized.
+    """
+    return tuple(signal.firwin(numtaps=filter_order, cutoff=cutoff,
+                               fs=fs, window='hamming'))
 
 
 class Resample(wiring.Component):
@@ -25,6 +42,8 @@ class Resample(wiring.Component):
     (and for output samples which are not discarded), which can make a big difference
     for large upsampling/interpolating ratios, and is what makes this a polyphase
     resampler - time complexity per output sample proportional to O(fir_order/N).
+    The zero padding is implied rather than sent to the FIR, which computes only
+    the phases that are kept after downsampling (see :py:`FIR` :py:`commutator`).
 
     Members
     -------
@@ -41,7 +60,11 @@ class Resample(wiring.Component):
                  m_down:     int,
                  bw:         float=0.4,
                  order_mult: int=5,
-                 shape=ASQ):
+                 shape=ASQ,
+                 polyphase_arms: bool=False,
+                 tap_bits:   int=None,
+                 pipeline:   bool=False,
+                 normalize_taps: bool=False):
         """
         fs_in : int
             Expected sample rate of incoming samples, used for calculating filter coefficients.
@@ -59,6 +82,23 @@ class Resample(wiring.Component):
             rounded up to the next multiple of :py:`n_up` (required for even zero padding).
         shape : fixed.Shape
             Fixed-point shape for input/output samples. Defaults to ASQ.
+        polyphase_arms : bool
+            If set, instead of a single strided FIR, :py:`n_up` FIR 'arms' are
+            instantiated, each holding every :py:`n_up`'th tap. Every input sample
+            is sent to all arms in parallel, and their outputs are interleaved.
+            This removes zero-padding entirely and gives up to :py:`n_up` times
+            the throughput, at the cost of :py:`n_up` multipliers and copies of the
+            sample history (total tap storage is unchanged). Only sensible for small
+            :py:`n_up`. Arms compute every output, even those discarded by :py:`m_down`.
+        tap_bits : int
+            Width of the quantized filter taps, see :class:`FIR`.
+        pipeline : bool
+            Use pipelined multipliers in the underlying FIR(s), see :class:`FIR`.
+        normalize_taps : bool
+            Normalize each tap to the full tap width in the underlying FIR(s),
+            see :class:`FIR`. The taps of a resampler are prescaled by
+            :py:`1/n_up` relative to the largest tap, so this recovers most of
+            the bits of :py:`tap_bits` lost to small taps at large :py:`n_up`.
         """
 
         gcd = math.gcd(n_up, m_down)
@@ -79,15 +119,44 @@ class Resample(wiring.Component):
             # optimization based on known zero padding).
             filter_order = self.n_up * ((filter_order // self.n_up) + 1)
 
-        self.filt = FIR(
-            fs=self.fs_in*self.n_up,
-            filter_cutoff_hz=min(self.fs_in*self.bw,
-                                 int((self.fs_in*self.bw)*(self.n_up/self.m_down))),
-            filter_order=filter_order,
-            prescale=self.n_up,
-            stride_i=self.n_up,
-            stride_o=self.m_down,
-            shape=shape)
+        self.polyphase_arms = polyphase_arms
+
+        # Cutoff at the lower of the input and output bandwidths, computed
+        # exactly, such that it is only rounded once (to a float).
+        bw_hz = self.fs_in * Fraction(self.bw).limit_denominator(1 << 16)
+        filter_cutoff_hz = float(min(bw_hz, bw_hz * self.n_up / self.m_down))
+
+        taps = _design_taps(self.fs_in*self.n_up, filter_cutoff_hz, filter_order)
+
+        if polyphase_arms:
+            self.taps_float = np.asarray(taps)
+            self.filts = [
+                FIR(fs=self.fs_in*self.n_up,
+                    filter_cutoff_hz=filter_cutoff_hz,
+                    filter_order=filter_order//self.n_up,
+                    prescale=self.n_up,
+                    shape=shape,
+                    taps=self.taps_float[k::self.n_up],
+                    tap_bits=tap_bits,
+                    pipeline=pipeline,
+                    normalize_taps=normalize_taps)
+                for k in range(self.n_up)
+            ]
+        else:
+            self.filt = FIR(
+                fs=self.fs_in*self.n_up,
+                filter_cutoff_hz=filter_cutoff_hz,
+                filter_order=filter_order,
+                prescale=self.n_up,
+                stride_i=self.n_up,
+                stride_o=self.m_down,
+                shape=shape,
+                commutator=True,
+                taps=taps,
+                tap_bits=tap_bits,
+                pipeline=pipeline,
+                normalize_taps=normalize_taps)
+            self.taps_float = self.filt.taps_float
 
         super().__init__({
             "i": In(stream.Signature(shape)),
@@ -98,29 +167,59 @@ class Resample(wiring.Component):
 
         m = Module()
 
+        if self.polyphase_arms:
+            return self.elaborate_arms(m)
+
         m.submodules.filt = filt = self.filt
 
-        upsample_counter  = Signal(range(self.n_up))
+        wiring.connect(m, wiring.flipped(self.i), filt.i)
+        wiring.connect(m, filt.o, wiring.flipped(self.o))
 
-        m.d.comb += [
-            self.i.ready.eq((upsample_counter == 0) & filt.i.ready),
-        ]
+        return m
 
-        with m.If(filt.i.ready):
-            with m.If(self.i.valid & self.i.ready):
-                m.d.comb += [
-                    filt.i.payload.eq(self.i.payload),
-                    filt.i.valid.eq(1),
-                ]
-                m.d.sync += upsample_counter.eq(self.n_up - 1)
-            with m.Elif(upsample_counter > 0):
-                m.d.comb += [
-                    filt.i.payload.eq(0),
-                    filt.i.valid.eq(1),
-                ]
-                m.d.sync += upsample_counter.eq(upsample_counter - 1)
+    def elaborate_arms(self, m):
 
+        named_submodules(m.submodules, self.filts, override_name="arm")
 
-        wiring.connect(m, filt.o, wiring.flipped(self.o))
+        # Every input sample is sent to all arms at once.
+
+        arms_ready = Cat([filt.i.ready for filt in self.filts]).all()
+        m.d.comb += self.i.ready.eq(arms_ready)
+        for filt in self.filts:
+            m.d.comb += [
+                filt.i.payload.eq(self.i.payload),
+                filt.i.valid.eq(self.i.valid & arms_ready),
+            ]
+
+        # Arm 'k' produces upsampled output 'k' of every 'n_up'. Visit the arms
+        # in order, only forwarding 1 of every 'm_down' outputs.
+
+        # Both counters are one-hot (rotated rather than incremented and
+        # compared), 'arm' selects the current arm and output 0 of every
+        # 'm_down' is kept when bit 0 of 'stride_o_pos' is set.
+        arm          = Signal(self.n_up, init=1)
+        stride_o_pos = Signal(self.m_down, init=1)
+        keep         = Signal()
+        arm_valid    = Signal()
+
+        m.d.comb += [
+            keep.eq(stride_o_pos[0]),
+            arm_valid.eq((Cat(filt.o.valid for filt in self.filts) & arm).any()),
+            self.o.valid.eq(arm_valid & keep),
+        ]
+
+        with m.Switch(arm):
+            for k, filt in enumerate(self.filts):
+                with m.Case(1 << k):
+                    m.d.comb += [
+                        self.o.payload.eq(filt.o.payload),
+                        filt.o.ready.eq(self.o.ready | ~keep),
+                    ]
+
+        with m.If(arm_valid & (self.o.ready | ~keep)):
+            m.d.sync += [
+                arm.eq(arm.rotate_left(1)),
+                stride_o_pos.eq(stride_o_pos.rotate_left(1)),
+            ]
 
         return m
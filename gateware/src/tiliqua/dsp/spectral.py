@@ -79,66 +79,90 @@ class BlockLPF(wiring.Component):
         # Filter memory and ports
         #
 
+        # Small filter memories are read asynchronously, so they can be
+        # implemented as LUT RAM rather than occupying a block RAM.
+        state_lutram = self.sz <= 64
+
         m.submodules.mem = mem = memory.Memory(shape=self.i_shape, depth=self.sz, init=[])
-        mem_rd = mem.read_port()
+        mem_rd = mem.read_port(domain="comb" if state_lutram else "sync")
         mem_wr = mem.write_port()
 
         #
         # Filter memory addressing
         #
 
-        idx = Signal(range(self.sz+1))
+        # 'payload.first' resets the index, so it never needs to count past
+        # the end of a block. For power-of-two sizes, it wraps by overflow,
+        # otherwise it is explicitly wrapped (for malformed blocks, which
+        # would otherwise address past the end of the filter memory).
+        idx = Signal(range(self.sz))
+        if self.sz & (self.sz - 1) == 0:
+            idx_next = (idx + 1)[:len(idx)]
+        else:
+            idx_next = Mux(idx == self.sz - 1, 0, idx + 1)
         l_in = Signal(self.i_shape)
         m.d.comb += [
-            mem_rd.en.eq(1),
             mem_rd.addr.eq(idx),
             mem_wr.addr.eq(idx),
         ]
-        m.d.sync += mem_wr.en.eq(0)
+        if not state_lutram:
+            m.d.comb += mem_rd.en.eq(1)
+
+        # Output register, occupied until the result is consumed.
+        o_full = Signal()
+        m.d.comb += self.o.valid.eq(o_full)
+        with m.If(self.o.valid & self.o.ready):
+            m.d.sync += o_full.eq(0)
 
         #
         # Iterative MAC state machine
         #
 
-        acc = Signal(mac.SQRNative)
+        # Rearranged as y = x + beta*(y - x), which needs only 1 multiply.
+        # The product is registered before it is added.
+        z = Signal(mac.SQRNative)
+        y = Signal(self.i_shape)
+
+        def accept():
+            # Take the next sample, and read its filter memory such that
+            # it is available on the next cycle (in 'MAC'), if the read
+            # is synchronous.
+            m.d.comb += self.i.ready.eq(1)
+            with m.If(self.i.valid):
+                m.d.sync += l_in.eq(self.i.payload.sample)
+                with m.If(self.i.payload.first):
+                    m.d.sync += idx.eq(0)
+                    m.d.comb += mem_rd.addr.eq(0)
+                with m.Else():
+                    m.d.sync += idx.eq(idx_next)
+                    m.d.comb += mem_rd.addr.eq(idx_next)
+                m.next = "MAC"
 
         with m.FSM():
             with m.State("IDLE"):
-                m.d.comb += self.i.ready.eq(1)
-                with m.If(self.i.valid):
-                    m.d.sync += l_in.eq(self.i.payload.sample)
-                    with m.If(self.i.payload.first):
-                        m.d.sync += idx.eq(0)
-                    with m.Else():
-                        m.d.sync += idx.eq(idx+1)
-                    m.next = "READ"
-
-            with m.State("READ"):
-                m.next = "MAC1"
-
-            with m.State("MAC1"):
-                with mp.Multiply(m, a=mem_rd.data, b=self.beta):
-                    m.d.sync += acc.eq(mp.result.z)
-                    m.next = "MAC2"
-
-            with m.State("MAC2"):
-                with mp.Multiply(m, a=l_in, b=(fixed.Const(1.0, shape=self.shape, clamp=True)-self.beta)):
-                    m.d.sync += acc.eq(acc + mp.result.z)
+                accept()
+
+            with m.State("MAC"):
+                with mp.Multiply(m, a=(mem_rd.data - l_in), b=self.beta):
+                    m.d.sync += z.eq(mp.result.z)
                     m.next = "UPDATE"
 
             with m.State("UPDATE"):
-                m.d.sync += [
-                    mem_wr.data.eq(acc),
-                    mem_wr.en.eq(1),
-                    self.o.payload.first.eq(idx == 0),
-                    self.o.payload.sample.eq(acc),
-                ]
-                m.next = "OUTPUT"
-
-            with m.State("OUTPUT"):
-                m.d.comb += self.o.valid.eq(1)
-                with m.If(self.o.ready):
+                # Wait only if the output register is still occupied.
+                m.d.comb += y.eq(z + l_in)
+                with m.If(~o_full | self.o.ready):
+                    m.d.comb += [
+                        mem_wr.data.eq(y),
+                        mem_wr.en.eq(1),
+                    ]
+                    m.d.sync += [
+                        self.o.payload.first.eq(idx == 0),
+                        self.o.payload.sample.eq(y),
+                        o_full.eq(1),
+                    ]
                     m.next = "IDLE"
+                    # Back-to-back samples skip 'IDLE'.
+                    accept()
 
         return m
 
@@ -165,15 +189,19 @@ class SpectralEnvelope(wiring.Component):
 
     def __init__(self,
                  shape: fixed.Shape,
-                 sz: int):
+                 sz: int,
+                 macp = None):
         """
         shape : Shape
             Shape of fixed-point number to use for streams.
         sz : int
             The size of each input block and outgoing spectral envelope blocks.
+        macp : mac.MAC
+            A :class:`mac.MAC` provider, for the smoothing filter multiplies.
         """
         self.shape = shape
         self.sz    = sz
+        self.macp  = macp
         super().__init__({
             "i": In(stream.Signature(Block(CQ(self.shape)))),
             "o": Out(stream.Signature(Block(self.shape))),
@@ -182,9 +210,10 @@ class SpectralEnvelope(wiring.Component):
     def elaborate(self, platform) -> Module:
         m = Module()
         m.submodules.rect_to_polar = rect_to_polar = block.WrapCore(cordic.RectToPolarCordic(
-                self.shape, magnitude_correction=False))
+                self.shape, magnitude_correction=False),
+                max_latency=1, shift_register=True)
         m.submodules.block_lpf = block_lpf = BlockLPF(
-                self.shape, self.sz)
+                self.shape, self.sz, macp=self.macp)
         wiring.connect(m, wiring.flipped(self.i), rect_to_polar.i)
         connect_magnitude_to_sq(m, rect_to_polar.o, block_lpf.i)
         wiring.connect(m, block_lpf.o, wiring.flipped(self.o))
@@ -222,15 +251,28 @@ class SpectralCrossSynthesis(wiring.Component):
 
     def __init__(self,
                  shape: fixed.Shape,
-                 sz: int):
+                 sz: int,
+                 macp = None,
+                 envelope_macp = None):
         """
         shape : Shape
             Shape of fixed-point number to use for block streams.
         sz : int
             Size of each block of complex spectra.
+        macp : mac.MAC
+            A :class:`mac.MAC` provider, for the carrier * envelope multiplies.
+            If it is a :py:`dual` provider, the real and imaginary products
+            are computed together with a single request. This is opt-in, as
+            a dual multiply needs a much wider multiplier.
+        envelope_macp : mac.MAC
+            A :class:`mac.MAC` provider, for the modulator :class:`SpectralEnvelope`.
+            This may be another client of the same server as :py:`macp`, such
+            that all multiplies of this core share a single multiplier.
         """
         self.shape = shape
         self.sz    = sz
+        self.macp  = macp or mac.MuxMAC()
+        self.envelope_macp = envelope_macp
         super().__init__({
             # All frequency domain spectra in blocks.
             "i_carrier": In(stream.Signature(Block(CQ(self.shape)))),
@@ -244,7 +286,7 @@ class SpectralCrossSynthesis(wiring.Component):
         # Connect modulator spectra to spectral envelope detector
 
         m.submodules.spectral_envelope = spectral_envelope = SpectralEnvelope(
-            shape=self.shape, sz=self.sz)
+            shape=self.shape, sz=self.sz, macp=self.envelope_macp)
         wiring.connect(m, wiring.flipped(self.i_modulator), spectral_envelope.i)
 
         # Time-synchronize output of 'spectral_envelope' with 'i_carrier' by
@@ -259,15 +301,23 @@ class SpectralCrossSynthesis(wiring.Component):
 
         # Shared multiplier for carrier * mag(modulator) terms
 
-        modulator_a = Signal(self.shape)
+        m.submodules.macp = mp = self.macp
+
         modulator_b = Signal(self.shape)
-        modulator_z = Signal(self.shape)
-        m.d.comb += modulator_z.eq((modulator_a * modulator_b)<<3)
 
         # Input latch
         l_carrier   = Signal.like(self.i_carrier.payload.sample)
         l_first     = Signal()
 
+        # Output register, occupied until the result is consumed. A new
+        # result is only started once it is free (or being drained), such
+        # that no separate state is needed to wait for 'o.ready'.
+        o_full = Signal()
+        o_free = ~o_full | self.o.ready
+        m.d.comb += self.o.valid.eq(o_full)
+        with m.If(self.o.valid & self.o.ready):
+            m.d.sync += o_full.eq(0)
+
         with m.FSM():
             with m.State("IDLE"):
                 # Wait for time-synchronized carrier and spectral envelope block
@@ -280,27 +330,36 @@ class SpectralCrossSynthesis(wiring.Component):
                         # with shared reset.)
                         l_first.eq(merge2.o.payload[0].first),
                     ]
-                    m.next = "REAL"
+                    m.next = "MUL" if mp.dual else "REAL"
 
             # Multiply real/imag components of carrier by modulator spectra
             # computed by SpectralEnvelope, pointwise
 
-            with m.State("REAL"):
-                m.d.comb += modulator_a.eq(l_carrier.real)
-                m.d.sync += self.o.payload.sample.real.eq(modulator_z)
-                m.next = "IMAG"
-
-            with m.State("IMAG"):
-                m.d.comb += modulator_a.eq(l_carrier.imag)
-                m.d.sync += self.o.payload.sample.imag.eq(modulator_z)
-                m.next = "OUTPUT"
-
-            with m.State("OUTPUT"):
-                m.d.comb += [
-                    self.o.valid.eq(1),
-                    self.o.payload.first.eq(l_first),
-                ]
-                with m.If(self.o.ready):
-                    m.next = "IDLE"
+            if mp.dual:
+                with m.State("MUL"):
+                    with m.If(o_free):
+                        with mp.MultiplyDual(m, l_carrier.real, l_carrier.imag, modulator_b):
+                            m.d.sync += [
+                                self.o.payload.sample.real.eq(mp.result.z << 3),
+                                self.o.payload.sample.imag.eq(mp.result.z1 << 3),
+                                self.o.payload.first.eq(l_first),
+                                o_full.eq(1),
+                            ]
+                            m.next = "IDLE"
+            else:
+                with m.State("REAL"):
+                    with m.If(o_free):
+                        with mp.Multiply(m, a=l_carrier.real, b=modulator_b):
+                            m.d.sync += self.o.payload.sample.real.eq(mp.result.z << 3)
+                            m.next = "IMAG"
+
+                with m.State("IMAG"):
+                    with mp.Multiply(m, a=l_carrier.imag, b=modulator_b):
+                        m.d.sync += [
+                            self.o.payload.sample.imag.eq(mp.result.z << 3),
+                            self.o.payload.first.eq(l_first),
+                            o_full.eq(1),
+                        ]
+                        m.next = "IDLE"
 
         return m
@@ -11,6 +11,29 @@ from amaranth.lib.wiring import In, Out
 from . import ASQ
 
 
+def aosoa_signature(shape, n_channels, lanes=1):
+    """
+    Signature of a multi-channel stream where channels are packed in groups
+    of :py:`lanes` (an 'array of structures of arrays'). Each payload is a
+    :py:`data.ArrayLayout` of :py:`n_channels // lanes` lane groups, each of
+    which is a :py:`data.ArrayLayout(shape, lanes)`.
+
+    For :py:`lanes == 1`, this is the same as the usual flat
+    :py:`data.ArrayLayout(shape, n_channels)` stream. Lane groups are useful
+    where a pipeline processes several channels at once, such that
+    :py:`Split` and :py:`Merge` only need to synchronize
+    :py:`n_channels // lanes` streams rather than every channel.
+
+    The bit-level layout is identical for any value of :py:`lanes`, so
+    streams may be reshaped using :py:`lanes_remap` without any logic.
+    """
+    assert n_channels % lanes == 0
+    if lanes == 1:
+        return stream.Signature(data.ArrayLayout(shape, n_channels))
+    return stream.Signature(data.ArrayLayout(
+        data.ArrayLayout(shape, lanes), n_channels // lanes))
+
+
 class Split(wiring.Component):
 
     """
@@ -27,57 +50,74 @@ class Split(wiring.Component):
         is replicated and at the output appears as :py:`n_channels` independent streams,
         which produce the same values, however may be synchronized/consumed independently.
 
+    For :py:`lanes > 1`, channels are split in groups of :py:`lanes` rather than
+    one at a time (see :py:`aosoa_signature`). Each outgoing stream then carries
+    a :py:`data.ArrayLayout(shape, lanes)`, and there are :py:`n_channels // lanes`
+    outgoing streams.
+
     This class is inspired by previous work in the lambdalib and LiteX projects.
     """
 
-    def __init__(self, n_channels, replicate=False, source=None, shape=ASQ):
+    def __init__(self, n_channels, replicate=False, source=None, shape=ASQ, lanes=1):
         """
         n_channels : int
-            The number of independent output streams. See usage above.
+            The number of independent output channels. See usage above.
         replicate : bool, optional
             See usage above.
         source : stream, optional
             Optional incoming stream to pass through to :py:`wiring.connect` on
             elaboration. This argument means you do not have to hook up :py:`self.i`
             and can make some pipelines a little easier to read.
+        lanes : int, optional
+            Number of channels packed into each outgoing stream. Must evenly
+            divide :py:`n_channels`.
         """
+        assert n_channels % lanes == 0
         self.n_channels   = n_channels
         self.replicate    = replicate
         self.source       = source
         self.shape        = shape
+        self.lanes        = lanes
+        self.n_groups     = n_channels // lanes
+        self.lane_shape   = shape if lanes == 1 else data.ArrayLayout(shape, lanes)
 
         if self.replicate:
             super().__init__({
-                "i": In(stream.Signature(shape)),
-                "o": Out(stream.Signature(shape)).array(n_channels),
+                "i": In(stream.Signature(self.lane_shape)),
+                "o": Out(stream.Signature(self.lane_shape)).array(self.n_groups),
             })
         else:
             super().__init__({
-                "i": In(stream.Signature(data.ArrayLayout(shape, n_channels))),
-                "o": Out(stream.Signature(shape)).array(n_channels),
+                "i": In(aosoa_signature(shape, n_channels, lanes)),
+                "o": Out(stream.Signature(self.lane_shape)).array(self.n_groups),
             })
 
     def elaborate(self, platform):
         m = Module()
 
-        done = Signal(self.n_channels)
+        done = Signal(self.n_groups)
 
-        m.d.comb += self.i.ready.eq(Cat([self.o[n].ready | done[n] for n in range(self.n_channels)]).all())
-        m.d.comb += [self.o[n].valid.eq(self.i.valid & ~done[n]) for n in range(self.n_channels)]
+        # Outgoing streams that are ready, or have already taken this payload.
+        # Reductions of a single vector (`.all()`) are mapped to balanced
+        # trees by synthesis, so no manual tree is needed for many channels.
+        readys = Signal(self.n_groups)
+        m.d.comb += readys.eq(Cat([self.o[n].ready | done[n] for n in range(self.n_groups)]))
+        m.d.comb += self.i.ready.eq(readys.all())
+        m.d.comb += [self.o[n].valid.eq(self.i.valid & ~done[n]) for n in range(self.n_groups)]
 
         if self.replicate:
-            m.d.comb += [self.o[n].payload.eq(self.i.payload) for n in range(self.n_channels)]
+            m.d.comb += [self.o[n].payload.eq(self.i.payload) for n in range(self.n_groups)]
         else:
-            m.d.comb += [self.o[n].payload.eq(self.i.payload[n]) for n in range(self.n_channels)]
+            m.d.comb += [self.o[n].payload.eq(self.i.payload[n]) for n in range(self.n_groups)]
 
         flow = [self.o[n].valid & self.o[n].ready
-                for n in range(self.n_channels)]
+                for n in range(self.n_groups)]
         end  = Cat([flow[n] | done[n]
-                    for n in range(self.n_channels)]).all()
+                    for n in range(self.n_groups)]).all()
         with m.If(end):
             m.d.sync += done.eq(0)
         with m.Else():
-            for n in range(self.n_channels):
+            for n in range(self.n_groups):
                 with m.If(flow[n]):
                     m.d.sync += done[n].eq(1)
 
@@ -90,7 +130,7 @@ class Split(wiring.Component):
         """Set out channels as permanently READY so they don't block progress."""
         for n in channels:
             wiring.connect(m, self.o[n],
-                           stream.Signature(self.shape, always_ready=True).flip().create())
+                           stream.Signature(self.lane_shape, always_ready=True).flip().create())
 
 
 class Merge(wiring.Component):
@@ -98,10 +138,14 @@ class Merge(wiring.Component):
     """
     Consumes payloads from multiple independent streams and merges them into a single stream.
 
+    For :py:`lanes > 1`, each incoming stream carries a group of :py:`lanes` channels
+    as a :py:`data.ArrayLayout(shape, lanes)`, and the outgoing stream has the
+    layout described by :py:`aosoa_signature`.
+
     This class is inspired by previous work in the lambdalib and LiteX projects.
     """
 
-    def __init__(self, n_channels, sink=None, shape=ASQ):
+    def __init__(self, n_channels, sink=None, shape=ASQ, lanes=1):
         """
         n_channels : int
             The number of independent incoming streams.
@@ -109,21 +153,30 @@ class Merge(wiring.Component):
             Optional outgoing stream to pass through to :py:`wiring.connect` on
             elaboration. This argument means you do not have to hook up :py:`self.o`
             and can make some pipelines a little easier to read.
+        lanes : int, optional
+            Number of channels packed into each incoming stream. Must evenly
+            divide :py:`n_channels`.
         """
+        assert n_channels % lanes == 0
         self.n_channels = n_channels
         self.sink       = sink
         self.shape      = shape
+        self.lanes      = lanes
+        self.n_groups   = n_channels // lanes
+        self.lane_shape = shape if lanes == 1 else data.ArrayLayout(shape, lanes)
         super().__init__({
-            "i": In(stream.Signature(shape)).array(n_channels),
-            "o": Out(stream.Signature(data.ArrayLayout(shape, n_channels))),
+            "i": In(stream.Signature(self.lane_shape)).array(self.n_groups),
+            "o": Out(aosoa_signature(shape, n_channels, lanes)),
         })
 
     def elaborate(self, platform):
         m = Module()
 
-        m.d.comb += [self.i[n].ready.eq(self.o.ready & self.o.valid) for n in range(self.n_channels)]
-        m.d.comb += [self.o.payload[n].eq(self.i[n].payload) for n in range(self.n_channels)]
-        m.d.comb += self.o.valid.eq(Cat([self.i[n].valid for n in range(self.n_channels)]).all())
+        m.d.comb += [self.i[n].ready.eq(self.o.ready & self.o.valid) for n in range(self.n_groups)]
+        m.d.comb += [self.o.payload[n].eq(self.i[n].payload) for n in range(self.n_groups)]
+        valids = Signal(self.n_groups)
+        m.d.comb += valids.eq(Cat([self.i[n].valid for n in range(self.n_groups)]))
+        m.d.comb += self.o.valid.eq(valids.all())
 
         if self.sink is not None:
             wiring.connect(m, self.o, self.sink)
@@ -133,7 +186,7 @@ class Merge(wiring.Component):
     def wire_valid(self, m, channels):
         """Set in channels as permanently VALID so they don't block progress."""
         for n in channels:
-            wiring.connect(m, stream.Signature(self.shape, always_valid=True).create(),
+            wiring.connect(m, stream.Signature(self.lane_shape, always_valid=True).create(),
                            self.i[n])
 
 class Arbiter(wiring.Component):
@@ -209,7 +262,7 @@ class SyncFIFOBuffered(wiring.Component):
 
         return m
 
-def connect_remap(m, stream_o, stream_i, mapping):
+def connect_remap(m, stream_o, stream_i, mapping=None):
     """
     Connect 2 streams, bypassing normal wiring.connect() checks
     that the signatures match. This allows easily remapping fields when
@@ -226,11 +279,24 @@ def connect_remap(m, stream_o, stream_i, mapping):
             i.payload.gain.eq(o.payload[1] << 2)
         ])
 
+    If the bit-representation of both payloads *does* match, :py:`mapping`
+    may be omitted, in which case the payload is reinterpreted as-is with
+    a single assignment (both payloads must have the same width).
+
     This is a bit of a hack. TODO perhaps implement this as a StreamConverter
     such that we can still use wiring.connect?.
     """
 
-    m.d.comb += mapping(stream_o, stream_i) + [
+    if mapping is None:
+        payload_o = Value.cast(stream_o.payload)
+        payload_i = Value.cast(stream_i.payload)
+        assert len(payload_o) == len(payload_i), \
+            "connect_remap without a mapping requires payloads of the same width"
+        payload = [payload_i.eq(payload_o)]
+    else:
+        payload = mapping(stream_o, stream_i)
+
+    m.d.comb += payload + [
         stream_i.valid.eq(stream_o.valid),
         stream_o.ready.eq(stream_i.ready)
     ]
@@ -260,6 +326,25 @@ def channel_remap(m, stream_o, stream_i, mapping_o_to_i):
     return connect_remap(m, stream_o, stream_i, remap)
 
 
+def lanes_remap(m, stream_o, stream_i):
+    """
+    Connect 2 multi-channel streams with the same total number of channels,
+    where either side may be packed into lane groups of a different size
+    (see :py:`aosoa_signature`). For example, to go from a flat 4-channel
+    stream to 2 lane groups of 2 channels each:
+
+    .. code-block:: python
+
+        s1 = stream.Signature(data.ArrayLayout(ASQ, 4)).create()
+        s2 = dsp.aosoa_signature(ASQ, 4, lanes=2).create()
+        dsp.lanes_remap(m, s1, s2)
+
+    Channel ``n`` on the source always maps to channel ``n`` on the sink.
+    """
+    # Lane grouping does not change the underlying bit layout.
+    return connect_remap(m, stream_o, stream_i)
+
+
 class KickFeedback(Elaboratable):
     """
     Inject a single dummy (garbage) sample after reset between
@@ -272,13 +357,12 @@ class KickFeedback(Elaboratable):
     def elaborate(self, platform):
         m = Module()
         wiring.connect(m, self.o, self.i)
-        with m.FSM() as fsm:
-            with m.State('KICK'):
-                m.d.comb += self.i.valid.eq(1)
-                with m.If(self.i.ready):
-                    m.next = 'FORWARD'
-            with m.State('FORWARD'):
-                pass
+        # Force 'valid' until the first (dummy) sample is consumed.
+        kicked = Signal(init=0)
+        with m.If(~kicked):
+            m.d.comb += self.i.valid.eq(1)
+            with m.If(self.i.ready):
+                m.d.sync += kicked.eq(1)
         return m
 
 
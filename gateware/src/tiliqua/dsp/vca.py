@@ -35,21 +35,22 @@ class VCA(wiring.Component):
 
         m.submodules.macp = mp = self.macp
 
-        with m.FSM() as fsm:
-
-            with m.State('WAIT-VALID'):
-                m.d.comb += self.i.ready.eq(1),
-                with m.If(self.i.valid):
-                   m.next = 'MAC'
-
-            with m.State('MAC'):
-                with mp.Multiply(m, a=self.i.payload[0], b=self.i.payload[1]):
-                    m.d.sync += self.o.payload.eq(mp.result.z.saturate(self.o.payload.shape()))
-                    m.next = 'WAIT-READY'
-
-            with m.State('WAIT-READY'):
-                m.d.comb += self.o.valid.eq(1),
-                with m.If(self.o.ready):
-                    m.next = 'WAIT-VALID'
+        # Output register, occupied until the product is consumed.
+        o_full = Signal()
+        m.d.comb += self.o.valid.eq(o_full)
+        with m.If(self.o.valid & self.o.ready):
+            m.d.sync += o_full.eq(0)
+
+        # Multiply directly from the input stream (payload is held stable
+        # until `i.ready`), whenever the output register is free or being
+        # drained this clock. The input is only consumed once the product
+        # is available, so back-to-back samples need no extra states.
+        with m.If(self.i.valid & (~o_full | self.o.ready)):
+            with mp.Multiply(m, a=self.i.payload[0], b=self.i.payload[1]):
+                m.d.comb += self.i.ready.eq(1)
+                m.d.sync += [
+                    self.o.payload.eq(mp.result.z.saturate(self.o.payload.shape())),
+                    o_full.eq(1),
+                ]
 
         return m
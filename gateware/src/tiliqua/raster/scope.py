@@ -335,7 +335,8 @@ class Spectrogram(wiring.Component):
             r = max(0, math.log2(max(1, x*max_v))/math.log2(max_v))
             return r
         m.submodules.log = log = dsp.block.WrapCore(dsp.WaveShaper(
-                lut_function=log_lut, lut_size=512, continuous=False))
+                lut_function=log_lut, lut_size=512, continuous=False),
+                max_latency=1, shift_register=True)
 
         wiring.connect(m, split4.o[0], resample.i)
         wiring.connect(m, resample.o, analyzer.i)
@@ -35,6 +35,16 @@ Assuming all N clients send a request message in the same clock, and the
 server processes one request per clock, the result will arrive at all clients
 N+1 clocks later, with the server busy for N out of N+1 of those clocks.
 
+A message slot is only released (marked INVALID) by the client consuming
+the response, rather than by the server consuming the request ('delayed'
+rather than 'early' release). This costs no throughput: the ring holds one
+slot per node, which is exactly the round trip length, the server can only
+process one request per clock, and each client has at most one request
+outstanding, so a client never waits for a slot while the server is idle.
+
+For many clients, the server may instead sit on several shorter rings (see
+``Server.n_rings``), which reduces the round trip to that of one sub-ring.
+
 To use this, you will want to create your components building on ``ringnoc.Client``
 and ``ringnoc.Server``. An example of this (sharing DSP tiles) is found in
 this repository as ``mac.RingMAC`` (client) and ``mac.RingMACServer``.
@@ -88,6 +98,22 @@ class Config:
             }),
         })
 
+def shift(m, i, o):
+    """
+    Shift message :py:`i` into register :py:`o` (one ring node).
+
+    The payload of an INVALID message is never looked at, so the (wide)
+    payload register only loads VALID messages, and holds otherwise. This
+    gives it a clock enable and keeps it from toggling while the ring is idle.
+    """
+    m.d.sync += [
+        o.source.eq(i.source),
+        o.kind.eq(i.kind),
+        o.tag.eq(i.tag),
+    ]
+    with m.If(i.kind == MessageKind.VALID):
+        m.d.sync += o.payload.eq(i.payload)
+
 class NodeSignature(wiring.Signature):
 
     """
@@ -118,18 +144,20 @@ class Client(wiring.Component):
     Under the hood, :py:`Client` will take care of not
     sending our request until the bus is free, and not asserting
     :py:`valid` until an appropriate response has arrived.
+
+    :py:`tag` is the unique ID of this client. It is a constant, so matching
+    responses to this client is a comparison against fixed bit values.
     """
 
-    def __init__(self, cfg: Config):
+    def __init__(self, cfg: Config, tag: int):
+        assert 0 <= tag < cfg.max_clients
+        self.tag = tag
         super().__init__({
             # Connection to Ring NoC (`Server` handles this)
             "ring":   Out(NodeSignature(cfg)),
 
             # Connections to your logic.
 
-            # Unique ID of this client. Must be set by a superclass.
-            "tag":    In(unsigned(cfg.tag_bits)),
-
             # Outgoing request shifted out to server
             "i":      In(cfg.payload_type_client),
             "strobe": In(1),
@@ -144,23 +172,26 @@ class Client(wiring.Component):
 
         ring = self.ring
 
-        m.d.sync += [
-            ring.o.eq(ring.i)
-        ]
-
         wait = Signal()
 
+        # The next message shifted out. By default, the incoming message is
+        # forwarded, it is then overridden below, such that every field of
+        # ring.o is written once per clock through a single level of muxes.
+        next_msg = Signal.like(ring.o)
+        m.d.comb += next_msg.eq(ring.i)
+        shift(m, next_msg, ring.o)
+
         # TODO: latch message after strobe until bus free?
         # => not really needed assuming current contract in MAC() baseclass.
 
         # Client: If no pending message on our input, we can shift a message out onto the ring.
         with m.If((ring.i.kind == MessageKind.INVALID) & self.strobe & ~wait):
-            m.d.sync += [
-                wait.eq(1),
-                ring.o.source.eq(MessageSource.CLIENT),
-                ring.o.kind.eq(MessageKind.VALID),
-                ring.o.tag.eq(self.tag),
-                ring.o.payload.client.eq(self.i),
+            m.d.sync += wait.eq(1)
+            m.d.comb += [
+                next_msg.source.eq(MessageSource.CLIENT),
+                next_msg.kind.eq(MessageKind.VALID),
+                next_msg.tag.eq(self.tag),
+                next_msg.payload.client.eq(self.i),
             ]
 
         # Client: If a message arrives from the server with our tag, we can consume it.
@@ -172,12 +203,10 @@ class Client(wiring.Component):
             m.d.comb += [
                 self.valid.eq(1),
                 self.o.eq(ring.i.payload.server),
+                next_msg.kind.eq(MessageKind.INVALID),
             ]
 
-            m.d.sync += [
-                ring.o.kind.eq(MessageKind.INVALID),
-                wait.eq(0),
-            ]
+            m.d.sync += wait.eq(0)
 
         return m
 
@@ -185,18 +214,33 @@ class Server(wiring.Component):
     """
     Process client requests. This component also manages the ring topology by
     creating clients and wiring them into a ring. When a valid client message
-    arrives, ``process_request`` is used to compute a response.
+    arrives, ``process_request(m, payload, tag)`` is used to compute a response,
+    where ``tag`` identifies the client that sent it.
 
     ``client_class`` can be any class that exposes a ``NodeSignature``, as
     long as it has a constructor that can take ``tag: int`` and ``cfg: Config``.
     A new instance of this is created whenever the user calls ``new_client``.
+
+    If ``pipeline`` is set, incoming messages are registered once more before
+    ``process_request`` sees them (for example, so a DSP tile can use its
+    input registers). This adds 1 clock to the ring round trip.
+
+    If ``n_rings`` is greater than 1, clients are distributed amongst that many
+    separate rings, which all pass through this server. For N clients, the
+    round trip is then about N/n_rings+1 clocks rather than N+1. Only one
+    request (from any ring) is processed per clock, granted round-robin between
+    rings. Requests that are not granted simply make another trip around their
+    ring before they are retried.
     """
 
-    def __init__(self, cfg: Config, process_request, client_class):
+    def __init__(self, cfg: Config, process_request, client_class, pipeline=False,
+                 n_rings=1):
         self.cfg = cfg
         self.client_class = client_class
         self.clients = []
         self.process_request = process_request
+        self.pipeline = pipeline
+        self.n_rings = n_rings
 
     def new_client(self):
         """Create and add a new client to the ring."""
@@ -209,29 +253,69 @@ class Server(wiring.Component):
     def elaborate(self, platform):
         m = Module()
 
-        assert len(self.clients) > 0, "Server must have at least one client"
+        assert len(self.clients) >= self.n_rings, "Server must have at least one client per ring"
 
-        # The Server's own ring connections (i / o)
-        ring = NodeSignature(self.cfg).create()
+        n_rings = self.n_rings
+        rings = []
+        msgs = []
+        for r in range(n_rings):
+            # The Server's own ring connections (i / o)
+            ring = NodeSignature(self.cfg).create(path=(f"ring{r}",))
+            clients = self.clients[r::n_rings]
 
-        # Server: default behavior: pass messages through
-        m.d.sync += ring.o.eq(ring.i)
+            if self.pipeline:
+                msg = Signal(self.cfg.msg_layout, name=f"msg{r}")
+                shift(m, ring.i, msg)
+            else:
+                msg = ring.i
 
-        # Wire up all clients in a ring, inserting ourselves at the end.
-        m.d.comb += [
-            self.clients[0].ring.i.eq(ring.o),
-            ring.i.eq(self.clients[-1].ring.o),
-        ]
-        for n in range(len(self.clients)-1):
-            m.d.comb += self.clients[n+1].ring.i.eq(self.clients[n].ring.o)
+            # Server: default behavior: pass messages through
+            shift(m, msg, ring.o)
 
-        # Server: valid client message: respond to it.
-        with m.If((ring.i.kind == MessageKind.VALID) &
-                  (ring.i.source == MessageSource.CLIENT)):
-            result = self.process_request(m, ring.i.payload.client)
-            m.d.sync += [
-                ring.o.source.eq(MessageSource.SERVER),
-                ring.o.payload.server.eq(result),
+            # Wire up all clients in a ring, inserting ourselves at the end.
+            m.d.comb += [
+                clients[0].ring.i.eq(ring.o),
+                ring.i.eq(clients[-1].ring.o),
             ]
+            for n in range(len(clients)-1):
+                m.d.comb += clients[n+1].ring.i.eq(clients[n].ring.o)
+
+            rings.append(ring)
+            msgs.append(msg)
+
+        # Rings with a valid client message waiting for a response.
+        pending = Signal(n_rings)
+        m.d.comb += pending.eq(Cat((msg.kind == MessageKind.VALID) &
+                                   (msg.source == MessageSource.CLIENT)
+                                   for msg in msgs))
+
+        # Serve the first pending ring at or after 'grant', then rotate
+        # 'grant' past it. Closest ring wins (assigned last).
+        grant = Signal(range(n_rings))
+        sel = Signal(range(n_rings))
+        with m.Switch(grant):
+            for g in range(n_rings):
+                with m.Case(g):
+                    for k in reversed(range(n_rings)):
+                        with m.If(pending[(g + k) % n_rings]):
+                            m.d.comb += sel.eq((g + k) % n_rings)
+
+        request = Signal(self.cfg.msg_layout)
+        with m.Switch(sel):
+            for r in range(n_rings):
+                with m.Case(r):
+                    m.d.comb += request.eq(msgs[r])
+
+        # Server: valid client message: respond to it.
+        with m.If(pending.any()):
+            m.d.sync += grant.eq(Mux(sel == n_rings - 1, 0, sel + 1))
+            result = self.process_request(m, request.payload.client, request.tag)
+            with m.Switch(sel):
+                for r in range(n_rings):
+                    with m.Case(r):
+                        m.d.sync += [
+                            rings[r].o.source.eq(MessageSource.SERVER),
+                            rings[r].o.payload.server.eq(result),
+                        ]
 
         return m
@@ -991,7 +991,11 @@ class Vocoder(wiring.Component):
         fftsz = 256 # FFT block size
         m.submodules.stft0 = stft0 = dsp.fft.STFTProcessor(shape=ASQ, sz=fftsz)
         m.submodules.analyzer1 = analyzer1 = dsp.fft.STFTAnalyzer(shape=ASQ, sz=fftsz)
-        m.submodules.vocoder0 = vocoder0 = dsp.spectral.SpectralCrossSynthesis(shape=ASQ, sz=fftsz)
+        # Envelope smoothing and cross-synthesis share a single multiplier.
+        m.submodules.mac_server = mac_server = dsp.mac.RingMACServer()
+        m.submodules.vocoder0 = vocoder0 = dsp.spectral.SpectralCrossSynthesis(
+            shape=ASQ, sz=fftsz, macp=mac_server.new_client(),
+            envelope_macp=mac_server.new_client())
 
         wiring.connect(m, stft0.o_freq, vocoder0.i_carrier)
         wiring.connect(m, analyzer1.o, vocoder0.i_modulator)
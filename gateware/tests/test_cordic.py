@@ -3,6 +3,7 @@ import unittest
 
 from amaranth import *
 from amaranth.sim import *
+from parameterized import parameterized
 
 from amaranth_future import fixed
 from tiliqua.dsp import ASQ, cordic
@@ -12,9 +13,13 @@ class CordicTests(unittest.TestCase):
 
     SHAPE = ASQ
 
-    def test_cordic_vector(self):
+    @parameterized.expand([
+        ["iterative", False],
+        ["pipelined", True],
+    ])
+    def test_cordic_vector(self, name, pipelined):
 
-        dut = cordic.RectToPolarCordic(self.SHAPE)
+        dut = cordic.RectToPolarCordic(self.SHAPE, pipelined=pipelined)
 
         async def test_case(ctx, real, imag, name=""):
             # Calculate expected values
@@ -76,5 +81,5 @@ class CordicTests(unittest.TestCase):
         sim = Simulator(dut)
         sim.add_clock(1e-6)
         sim.add_testbench(testbench)
-        with sim.write_vcd(vcd_file=open(f"test_cordic.vcd", "w")):
+        with sim.write_vcd(vcd_file=open(f"test_cordic_{name}.vcd", "w")):
             sim.run()
@@ -23,23 +23,40 @@ class DSPTests(unittest.TestCase):
 
 
     @parameterized.expand([
-        ["dual_sine_small",          100, 16, 1, 17, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
-        ["dual_sine_large",          100, 64, 1, 65, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
-        ["dual_sine_odd",            100, 59, 1, 60, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
-        ["impulse_small_9",          100,  9, 1, 10, 0.005, lambda n: 0.95 if n == 0 else 0.0],
-        ["impulse_small_10",         100, 10, 1, 11, 0.005, lambda n: 0.95 if n == 0 else 0.0],
-        ["impulse_small_16",         100, 16, 1, 17, 0.005, lambda n: 0.95 if n == 0 else 0.0],
-        ["sine_interpolator_s1_n16", 100, 16, 1, 17, 0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0],
+        ["dual_sine_small",          100, 16, 1, 9,  0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
+        ["dual_sine_large",          100, 64, 1, 33, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
+        ["dual_sine_odd",            100, 59, 1, 31, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
+        ["impulse_small_9",          100,  9, 1, 6,  0.005, lambda n: 0.95 if n == 0 else 0.0],
+        ["impulse_small_10",         100, 10, 1, 6,  0.005, lambda n: 0.95 if n == 0 else 0.0],
+        ["impulse_small_16",         100, 16, 1, 9,  0.005, lambda n: 0.95 if n == 0 else 0.0],
+        ["sine_interpolator_s1_n16", 100, 16, 1, 9,  0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0],
         ["sine_interpolator_s2_n16", 100, 16, 2, 9,  0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0],
         ["sine_interpolator_s4_n16", 100, 16, 4, 5,  0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0],
         ["sine_interpolator_s2_n10", 100, 10, 2, 6,  0.005, lambda n: 0.9*math.sin(n*0.2) if n % 2 == 0 else 0.0],
         ["sine_interpolator_s3_n9",  100,  9, 3, 4,  0.005, lambda n: 0.9*math.sin(n*0.2) if n % 3 == 0 else 0.0],
+        ["dual_sine_large_mac4",     100, 64, 1, 17, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 4],
+        ["impulse_small_9_mac3",     100,  9, 1, 4,  0.005, lambda n: 0.95 if n == 0 else 0.0, 3],
+        ["sine_interpolator_s2_n16_mac2", 100, 16, 2, 5, 0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0, 2],
+        ["impulse_small_10_mac2",    100, 10, 1, 6,  0.005, lambda n: 0.95 if n == 0 else 0.0, 2],
+        ["dual_sine_small_blmac",    100, 16, 1, 39, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 1, 'blmac'],
+        ["impulse_small_9_blmac",    100,  9, 1, 27, 0.005, lambda n: 0.95 if n == 0 else 0.0, 1, 'blmac'],
+        ["sine_interpolator_s2_n16_blmac", 100, 16, 2, 39, 0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0, 1, 'blmac'],
+        ["dual_sine_small_pipeline", 100, 16, 1, 11, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 1, 'mac', True],
+        ["dual_sine_large_mac4_pipeline", 100, 64, 1, 19, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 4, 'mac', True],
+        ["sine_interpolator_s2_n16_mac2_pipeline", 100, 16, 2, 7, 0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0, 2, 'mac', True],
+        ["dual_sine_large_taps12",   100, 64, 1, 33, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 1, 'mac', False, 12],
+        ["sine_interpolator_s4_n16_taps10", 100, 16, 4, 5, 0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0, 1, 'mac', False, 10],
+        ["dual_sine_small_blmac_taps10", 100, 16, 1, 18, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 1, 'blmac', False, 10],
+        ["dual_sine_large_taps8_norm", 100, 64, 1, 33, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), 1, 'mac', False, 8, True],
+        ["sine_interpolator_s2_n16_mac2_pipeline_taps8_norm", 100, 16, 2, 7, 0.005, lambda n: 0.9*math.sin(n*0.2) if n % 4 == 0 else 0.0, 2, 'mac', True, 8, True],
     ])
-    def test_fir(self, name, n_samples, n_order, stride_i, expected_latency, tolerance, stimulus_function):
+    def test_fir(self, name, n_samples, n_order, stride_i, expected_latency, tolerance, stimulus_function,
+                 n_mac=1, backend='mac', pipeline=False, tap_bits=None, normalize_taps=False):
 
         m = Module()
         dut = dsp.FIR(fs=48000, filter_cutoff_hz=2000,
-                      filter_order=n_order, stride_i=stride_i)
+                      filter_order=n_order, stride_i=stride_i, n_mac=n_mac, backend=backend,
+                      pipeline=pipeline, tap_bits=tap_bits, normalize_taps=normalize_taps)
         m.submodules.dut = dut
 
         # fake signals so we can see the expected output in VCD output.
@@ -97,17 +114,110 @@ class DSPTests(unittest.TestCase):
         with sim.write_vcd(vcd_file=open(f"test_fir_{name}.vcd", "w")):
             sim.run()
 
+    @parameterized.expand([
+        ["m2",       50, 16, 2, 'mac',   0.005],
+        ["m3_mac2",  50, 16, 3, 'mac',   0.005, 2],
+        ["m2_blmac", 50, 16, 2, 'blmac', 0.005],
+    ])
+    def test_fir_decimate(self, name, n_samples, n_order, stride_o, backend, tolerance, n_mac=1):
+
+        dut = dsp.FIR(fs=48000, filter_cutoff_hz=2000, filter_order=n_order,
+                      stride_o=stride_o, backend=backend, n_mac=n_mac)
+
+        x = [fixed.Const(0.4*(math.sin(n*0.2) + math.sin(n)), shape=ASQ)
+             for n in range(n_samples*stride_o)]
+        y_expected = signal.lfilter(dut.taps_float, [1.0], [v.as_float() for v in x])[::stride_o]
+
+        async def stimulus_i(ctx):
+            for v in x:
+                await stream.put(ctx, dut.i, v)
+
+        async def testbench(ctx):
+            """Discarded outputs should only cost a single cycle each."""
+            ctx.set(dut.o.ready, 1)
+            n_samples_out = 0
+            n_skipped = 0
+            while n_samples_out < n_samples:
+                with_mac = ctx.get(dut.i.valid & dut.i.ready)
+                if ctx.get(dut.o.valid):
+                    assert abs(ctx.get(dut.o.payload).as_float() - y_expected[n_samples_out]) < tolerance
+                    n_samples_out += 1
+                await ctx.tick()
+                if with_mac and ctx.get(dut.i.ready):
+                    n_skipped += 1
+            assert n_skipped == (n_samples - 1)*(stride_o - 1)
+
+        sim = Simulator(dut)
+        sim.add_clock(1e-6)
+        sim.add_testbench(stimulus_i, background=True)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_fir_decimate_{name}.vcd", "w")):
+            sim.run()
+
+    @parameterized.expand([
+        ["dual_sine_small",      100, 16, None, None, 1, 7, 0.005],
+        ["dual_sine_small_csd4", 100, 16, 4,    None, 1, 6, 0.005],
+        ["dual_sine_odd_csd3",   100,  9, 3,    None, 1, 5, 0.005],
+        ["dual_sine_odd_m2",     100, 15, 4,    10,   2, 6, 0.005],
+        ["dual_sine_small_systolic", 100, 16, None, None, 1, 1, 0.005, 'systolic'],
+        ["dual_sine_odd_systolic_m3", 100, 15, None, 12,  3, 1, 0.005, 'systolic'],
+    ])
+    def test_fir_unrolled(self, name, n_samples, n_order, csd_terms, tap_bits, stride_o,
+                          expected_latency, tolerance, backend='csd'):
+
+        dut = dsp.FIR(fs=48000, filter_cutoff_hz=2000, filter_order=n_order,
+                      backend=backend, csd_terms=csd_terms, tap_bits=tap_bits,
+                      stride_o=stride_o)
+
+        x = [fixed.Const(0.4*(math.sin(n*0.2) + math.sin(n)), shape=ASQ)
+             for n in range(n_samples*stride_o)]
+        y_expected = signal.lfilter(dut.taps_float, [1.0], [v.as_float() for v in x])[::stride_o]
+
+        async def stimulus_i(ctx):
+            for v in x:
+                await stream.put(ctx, dut.i, v)
+
+        async def testbench(ctx):
+            """Outputs are emitted every 'stride_o' cycles once the pipeline is full."""
+            ctx.set(dut.o.ready, 1)
+            n_samples_out = 0
+            n_cycles = 0
+            while n_samples_out < n_samples:
+                if ctx.get(dut.o.valid):
+                    if n_samples_out == 0:
+                        assert n_cycles == expected_latency
+                    assert abs(ctx.get(dut.o.payload).as_float() - y_expected[n_samples_out]) < tolerance
+                    n_samples_out += 1
+                await ctx.tick()
+                n_cycles += 1
+            assert n_cycles == (n_samples - 1)*stride_o + expected_latency + 1
+
+        sim = Simulator(dut)
+        sim.add_clock(1e-6)
+        sim.add_testbench(stimulus_i, background=True)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_fir_unrolled_{name}.vcd", "w")):
+            sim.run()
+
     @parameterized.expand([
         ["dual_sine_n4_m1",     100, 4,  1, 4,   1,   0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
+        ["dual_sine_n4_m1_taps12", 100, 4, 1, 4,  1,   0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), False, 12],
+        ["dual_sine_n4_m1_pipeline", 100, 4, 1, 4, 1,  0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), False, None, True],
+        ["dual_sine_n4_m1_taps9_norm", 100, 4, 1, 4, 1, 0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), False, 9, False, True],
         # TODO (below this comment): all visually look correct, fix reference alignment and reduce tolerance.
         ["dual_sine_n1_m4",     100, 14, 0, 1,   4,   0.1,   lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
         ["dual_sine_n2_m3",     100, 5,  0, 2,   3,   0.25,  lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
         ["dual_sine_n441_m480", 50,  5,  0, 441, 480, 0.25,  lambda n: 0.4*(math.sin(n*0.2) + math.sin(n))],
+        ["dual_sine_n4_m1_arms", 100, 4, 1, 4,   1,   0.005, lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), True],
+        ["dual_sine_n2_m3_arms", 100, 5, 0, 2,   3,   0.25,  lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)), True],
     ])
-    def test_resample(self, name, n_samples, n_pad, n_align, n_up, m_down, tolerance, stimulus_function):
+    def test_resample(self, name, n_samples, n_pad, n_align, n_up, m_down, tolerance, stimulus_function,
+                      polyphase_arms=False, tap_bits=None, pipeline=False, normalize_taps=False):
 
         m = Module()
-        dut = dsp.Resample(fs_in=48000, n_up=n_up, m_down=m_down, order_mult=8)
+        dut = dsp.Resample(fs_in=48000, n_up=n_up, m_down=m_down, order_mult=8,
+                           polyphase_arms=polyphase_arms, tap_bits=tap_bits,
+                           pipeline=pipeline, normalize_taps=normalize_taps)
         m.submodules.dut = dut
 
         # fake signals so we can see the expected output in VCD output.
@@ -125,7 +235,7 @@ class DSPTests(unittest.TestCase):
             x = [v.as_float() for v in itertools.islice(stimulus_values(), n_samples)]
             # zero padding needed to align to the RTL outputs.
             x = [0]*n_pad + x
-            resampled = signal.resample_poly(x, dut.n_up, dut.m_down, window=dut.filt.taps_float)
+            resampled = signal.resample_poly(x, dut.n_up, dut.m_down, window=dut.taps_float)
             aligned =  resampled[n_align:-10]
             return aligned
 
@@ -168,8 +278,10 @@ class DSPTests(unittest.TestCase):
     @parameterized.expand([
         ["mux_mac", mac.MuxMAC],
         ["ring_mac", mac.RingMAC],
+        ["arbiter_mac", mac.ArbiterMAC],
+        ["mux_mac_two_taps", mac.MuxMAC, True],
     ])
-    def test_pitch(self, name, mac_type):
+    def test_pitch(self, name, mac_type, two_taps=False):
 
         m = Module()
 
@@ -177,11 +289,15 @@ class DSPTests(unittest.TestCase):
             case mac.RingMAC:
                 m.submodules.server = server = mac.RingMACServer()
                 macp = server.new_client()
+            case mac.ArbiterMAC:
+                m.submodules.server = server = mac.ArbiterMACServer()
+                macp = server.new_client()
             case _:
                 macp = None
 
         delayln = dsp.DelayLine(max_delay=256, write_triggers_read=False)
-        pitch_shift = dsp.PitchShift(tap=delayln.add_tap(), xfade=32, macp=macp)
+        pitch_shift = dsp.PitchShift(tap=delayln.add_tap(), xfade=32, macp=macp,
+                                     tap1=delayln.add_tap() if two_taps else None)
         m.submodules += [delayln, pitch_shift]
 
         def stimulus_values():
@@ -224,17 +340,30 @@ class DSPTests(unittest.TestCase):
     @parameterized.expand([
         ["mux_mac", mac.MuxMAC],
         ["ring_mac", mac.RingMAC],
+        ["arbiter_mac", mac.ArbiterMAC],
+        ["mux_mac_parallel", mac.MuxMAC, True],
+        ["ring_mac_parallel", mac.RingMAC, True],
+        ["mux_mac_pipelined", mac.MuxMAC, False, 1],
+        ["mux_mac_pipelined_parallel", mac.MuxMAC, True, 2],
+        ["ring_mac_pipelined", mac.RingMAC, False, 1],
     ])
-    def test_svf(self, name, mac_type):
+    def test_svf(self, name, mac_type, parallel=False, pipeline_stages=0):
 
         match mac_type:
             case mac.RingMAC:
                 m = Module()
-                m.submodules.server = server = mac.RingMACServer()
+                m.submodules.server = server = mac.RingMACServer(pipeline=pipeline_stages > 0)
+                macp2 = server.new_client() if parallel else None
+                m.submodules.svf = dut = dsp.SVF(macp=server.new_client(), macp2=macp2)
+            case mac.ArbiterMAC:
+                m = Module()
+                m.submodules.server = server = mac.ArbiterMACServer()
                 m.submodules.svf = dut = dsp.SVF(macp=server.new_client())
             case _:
                 m = Module()
-                m.submodules.svf = dut = dsp.SVF()
+                macp = mac.MuxMAC(pipeline_stages=pipeline_stages)
+                macp2 = mac.MuxMAC(pipeline_stages=pipeline_stages) if parallel else None
+                m.submodules.svf = dut = dsp.SVF(macp=macp, macp2=macp2)
 
         async def stimulus(ctx):
             for n in range(0, 200):
@@ -258,6 +387,224 @@ class DSPTests(unittest.TestCase):
         with sim.write_vcd(vcd_file=open(f"test_svf_{name}.vcd", "w")):
             sim.run()
 
+    @parameterized.expand([
+        ["ring_mac", mac.RingMACServer],
+        ["ring_mac_2_rings", lambda: mac.RingMACServer(n_rings=2)],
+        ["ring_mac_mantissa16", lambda: mac.RingMACServer(mantissa_bits=16)],
+        ["arbiter_mac", mac.ArbiterMACServer],
+    ])
+    def test_shared_mac(self, name, server_type):
+
+        m = Module()
+        m.submodules.server = server = server_type()
+        vcas = [dsp.VCA(macp=server.new_client()) for _ in range(3)]
+        dsp.named_submodules(m.submodules, vcas)
+
+        def stimulus_values(k, n):
+            return [fixed.Const(0.8*math.sin(n*0.3+k), shape=mac.SQNative),
+                    fixed.Const(0.5*(k+1)*math.sin(n*0.1), shape=mac.SQNative)]
+
+        def mk_stimulus(k):
+            async def stimulus(ctx):
+                for n in range(20):
+                    await stream.put(ctx, vcas[k].i, stimulus_values(k, n))
+            return stimulus
+
+        def mk_testbench(k):
+            async def testbench(ctx):
+                for n in range(20):
+                    x, gain = stimulus_values(k, n)
+                    result = await stream.get(ctx, vcas[k].o)
+                    expected = max(min(x.as_float()*gain.as_float(), ASQ.max().as_float()),
+                                   ASQ.min().as_float())
+                    self.assertAlmostEqual(result.as_float(), expected, places=3)
+            return testbench
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        for k in range(len(vcas)):
+            sim.add_testbench(mk_stimulus(k), background=True)
+            sim.add_testbench(mk_testbench(k))
+        with sim.write_vcd(vcd_file=open(f"test_shared_mac_{name}.vcd", "w")):
+            sim.run()
+
+    # Operands (a, b, c) for MAC requests, as floats. Each MAC mode below
+    # includes the extremes of 'mac.SQNative' where results are most
+    # likely to overflow or collide, followed by these.
+    MAC_OPERANDS = [(0.8*math.sin(n*0.3), 0.5*math.sin(n*0.7+1), 0.9*math.cos(n*0.2))
+                    for n in range(20)]
+    SQ_LO, SQ_HI = mac.SQNative.min().as_float(), mac.SQNative.max().as_float()
+    DUAL_EXTREMES = [(SQ_LO, SQ_LO, SQ_LO), (SQ_HI, SQ_HI, SQ_HI), (SQ_LO, SQ_HI, SQ_LO),
+                     (0.0, SQ_LO, SQ_HI), (SQ_HI, 0.0, SQ_LO), (0.0, 0.0, SQ_HI), (SQ_HI, SQ_LO, 0.0)]
+    PREADD_EXTREMES = [(SQ_LO/2, SQ_LO/2, SQ_LO), (SQ_HI/2, SQ_HI/2, SQ_HI), (SQ_LO, SQ_HI, SQ_LO),
+                       (0.0, SQ_LO, SQ_HI), (0.5, -0.5, SQ_HI), (SQ_HI, SQ_LO, 0.0)]
+    POSTADD_EXTREMES = [(SQ_LO, SQ_LO, SQ_LO), (SQ_HI, SQ_HI, SQ_HI), (SQ_LO, SQ_HI, SQ_HI),
+                        (0.0, SQ_HI, SQ_LO), (SQ_HI, 0.0, 0.5)]
+
+    @parameterized.expand([
+        ["dual_mux_mac",              lambda: mac.MuxMAC(dual=True),
+         lambda p, m, a0, a1, b: p.MultiplyDual(m, a0, a1, b),
+         lambda a0, a1, b: (a0*b, a1*b),
+         DUAL_EXTREMES],
+        ["dual_mux_mac_pipelined",    lambda: mac.MuxMAC(pipeline_stages=2, dual=True),
+         lambda p, m, a0, a1, b: p.MultiplyDual(m, a0, a1, b),
+         lambda a0, a1, b: (a0*b, a1*b),
+         DUAL_EXTREMES],
+        ["dual_ring_mac",             lambda: mac.RingMACServer(dual=True),
+         lambda p, m, a0, a1, b: p.MultiplyDual(m, a0, a1, b),
+         lambda a0, a1, b: (a0*b, a1*b),
+         DUAL_EXTREMES],
+        ["preadd_mux_mac",            lambda: mac.MuxMAC(preadd=True),
+         lambda p, m, a, d, b: p.MultiplyPreadd(m, a, d, b),
+         lambda a, d, b: ((a+d)*b,),
+         PREADD_EXTREMES],
+        ["preadd_mux_mac_pipelined",  lambda: mac.MuxMAC(pipeline_stages=2, preadd=True),
+         lambda p, m, a, d, b: p.MultiplyPreadd(m, a, d, b),
+         lambda a, d, b: ((a+d)*b,),
+         PREADD_EXTREMES],
+        ["preadd_ring_mac",           lambda: mac.RingMACServer(preadd=True),
+         lambda p, m, a, d, b: p.MultiplyPreadd(m, a, d, b),
+         lambda a, d, b: ((a+d)*b,),
+         PREADD_EXTREMES],
+        ["postadd_mux_mac",           lambda: mac.MuxMAC(postadd=True),
+         lambda p, m, a, b, c: p.MultiplyAdd(m, a, b, c),
+         lambda a, b, c: (a*b + c,),
+         POSTADD_EXTREMES],
+        ["postadd_mux_mac_pipelined", lambda: mac.MuxMAC(pipeline_stages=1, postadd=True),
+         lambda p, m, a, b, c: p.MultiplyAdd(m, a, b, c),
+         lambda a, b, c: (a*b + c,),
+         POSTADD_EXTREMES],
+        ["postadd_ring_mac",          lambda: mac.RingMACServer(postadd=True),
+         lambda p, m, a, b, c: p.MultiplyAdd(m, a, b, c),
+         lambda a, b, c: (a*b + c,),
+         POSTADD_EXTREMES],
+    ])
+    def test_mac_modes(self, name, provider, request, reference, extremes):
+
+        m = Module()
+        macp = provider()
+        if isinstance(macp, mac.MAC):
+            m.submodules.macp = macp
+        else:
+            m.submodules.server = macp
+            m.submodules.macp = macp = macp.new_client()
+
+        ops = [Signal(mac.SQNative, name=f"op{n}") for n in range(3)]
+        n_results = len(reference(0.0, 0.0, 0.0))
+        fields = ["z", "z1"][:n_results]
+        z = [Signal.like(getattr(macp.result, f), name=f) for f in fields]
+        go = Signal()
+        done = Signal()
+        with m.If(go & ~done):
+            with request(macp, m, *ops):
+                m.d.sync += [zn.eq(getattr(macp.result, f)) for zn, f in zip(z, fields)]
+                m.d.sync += done.eq(1)
+        with m.If(~go):
+            m.d.sync += done.eq(0)
+
+        async def testbench(ctx):
+            for operands in extremes + self.MAC_OPERANDS:
+                v = [fixed.Const(x, shape=mac.SQNative) for x in operands]
+                for op, vn in zip(ops, v):
+                    ctx.set(op, vn)
+                ctx.set(go, 1)
+                await ctx.tick().until(done)
+                expected = reference(*[vn.as_float() for vn in v])
+                self.assertEqual([ctx.get(zn).as_float() for zn in z], list(expected))
+                ctx.set(go, 0)
+                await ctx.tick()
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_mac_modes_{name}.vcd", "w")):
+            sim.run()
+
+    def test_const_mac(self):
+
+        m = Module()
+        m.submodules.macp = macp = mac.MuxMAC()
+
+        lo, hi = mac.SQNative.min().as_float(), mac.SQNative.max().as_float()
+        consts = [0.0, 0.99, -0.5, 0.123, hi, lo]
+        a = [fixed.Const(x, shape=mac.SQNative) for x in consts]
+        b = Signal(mac.SQNative)
+        z = [Signal(mac.SQRNative, name=f"z{n}") for n in range(len(a))]
+        for n, an in enumerate(a):
+            m.d.comb += z[n].eq(macp.MultiplyConst(an, b))
+
+        self.assertEqual(macp.stats.multiply, 0)
+        self.assertEqual(macp.stats.multiply_const, len(a))
+
+        async def testbench(ctx):
+            for vb in [lo, hi, 0.0, 0.5, -0.77, 1e-4]:
+                vb = fixed.Const(vb, shape=mac.SQNative)
+                ctx.set(b, vb)
+                for an, zn in zip(a, z):
+                    self.assertEqual(ctx.get(zn).as_float(),
+                                     an.as_float()*vb.as_float())
+
+        sim = Simulator(m)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_const_mac.vcd", "w")):
+            sim.run()
+
+    @parameterized.expand([
+        ["mux_mac", None],
+        ["mux_mac_pipelined", None, 0, 2],
+        ["ring_mac", False],
+        ["ring_mac_pipelined", True],
+        ["ring_mac_3_rings", False, 3],
+    ])
+    def test_accumulate_mac(self, name, pipeline, n_rings=1, pipeline_stages=0):
+
+        m = Module()
+        n_clients = 3
+        n_terms = 8
+        if pipeline is None:
+            macps = [mac.MuxMAC(accumulate=True, pipeline_stages=pipeline_stages)
+                     for _ in range(n_clients)]
+        else:
+            m.submodules.server = server = mac.RingMACServer(accumulate=True, pipeline=pipeline,
+                                                             n_rings=n_rings)
+            macps = [server.new_client() for _ in range(n_clients)]
+        dsp.named_submodules(m.submodules, macps)
+
+        # Every client computes sum(a[k]*b[k]) concurrently, with its own accumulator.
+        def operands(c, k):
+            return (fixed.Const(0.9*math.sin(k*0.7+c), shape=mac.SQNative),
+                    fixed.Const(0.8*math.cos(k*0.3-c), shape=mac.SQNative))
+
+        results = []
+        for c, macp in enumerate(macps):
+            k = Signal(range(n_terms+1))
+            a = Array(operands(c, n)[0].as_value() for n in range(n_terms))
+            b = Array(operands(c, n)[1].as_value() for n in range(n_terms))
+            z = Signal.like(macp.result.z)
+            results.append((k, z))
+            with m.If(k != n_terms):
+                with macp.MultiplyAccumulate(m,
+                        a=fixed.Value.cast(a[k], mac.SQNative.f_bits),
+                        b=fixed.Value.cast(b[k], mac.SQNative.f_bits),
+                        accumulate=(k != 0)):
+                    m.d.sync += [
+                        z.eq(macp.result.z),
+                        k.eq(k+1),
+                    ]
+
+        async def testbench(ctx):
+            await ctx.tick().until(Cat(k == n_terms for k, _ in results).all())
+            for c, (_, z) in enumerate(results):
+                expected = sum(a.as_float()*b.as_float() for a, b in
+                               (operands(c, n) for n in range(n_terms)))
+                self.assertEqual(ctx.get(z).as_float(), expected)
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_accumulate_mac_{name}.vcd", "w")):
+            sim.run()
+
     def test_matrix(self):
 
         matrix = dsp.MatrixMix(
@@ -290,6 +637,8 @@ class DSPTests(unittest.TestCase):
     @parameterized.expand([
         ["mux_mac", mac.MuxMAC],
         ["ring_mac", mac.RingMAC],
+        ["arbiter_mac", mac.ArbiterMAC],
+        ["booth", None],
     ])
     def test_waveshaper(self, name, mac_type):
 
@@ -302,6 +651,15 @@ class DSPTests(unittest.TestCase):
                 m.submodules.server = server = mac.RingMACServer()
                 m.submodules.waveshaper = dut = dsp.WaveShaper(
                     lut_function=scaled_tanh, lut_size=16, macp=server.new_client())
+            case mac.ArbiterMAC:
+                m = Module()
+                m.submodules.server = server = mac.ArbiterMACServer()
+                m.submodules.waveshaper = dut = dsp.WaveShaper(
+                    lut_function=scaled_tanh, lut_size=16, macp=server.new_client())
+            case None:
+                m = Module()
+                m.submodules.waveshaper = dut = dsp.WaveShaper(
+                    lut_function=scaled_tanh, lut_size=16, backend="booth")
             case _:
                 m = Module()
                 m.submodules.waveshaper = dut = dsp.WaveShaper(lut_function=scaled_tanh, lut_size=16)
@@ -331,7 +689,10 @@ class DSPTests(unittest.TestCase):
                 x = fixed.Const(0.8*math.sin(n*0.3), shape=mac.SQNative)
                 gain = fixed.Const(3.0*math.sin(n*0.1), shape=mac.SQNative)
                 await stream.put(ctx, vca.i, [x, gain])
-                _ = await stream.get(ctx, vca.o)
+                result = await stream.get(ctx, vca.o)
+                expected = max(min(x.as_float()*gain.as_float(), ASQ.max().as_float()),
+                               ASQ.min().as_float())
+                self.assertAlmostEqual(result.as_float(), expected, places=3)
 
         sim = Simulator(m)
         sim.add_clock(1e-6)
@@ -374,8 +735,14 @@ class DSPTests(unittest.TestCase):
         dut = dsp.DWO()
 
         async def testbench(ctx):
+            results = []
             for n in range(0, 400):
                 result = await stream.get(ctx, dut.o)
+                results.append(result.as_float())
+            # Amplitude is set by the initial conditions, and must not drift.
+            for k in range(0, 400, 100):
+                self.assertAlmostEqual(max(results[k:k+100]), 0.5, delta=0.005)
+                self.assertAlmostEqual(min(results[k:k+100]), -0.5, delta=0.005)
 
         sim = Simulator(dut)
         sim.add_clock(1e-6)
@@ -383,6 +750,112 @@ class DSPTests(unittest.TestCase):
         with sim.write_vcd(vcd_file=open("test_dwo.vcd", "w")):
             sim.run()
 
+    @parameterized.expand([
+        ["n3", 3, 1],
+        ["n2_4ch", 2, 4],
+    ])
+    def test_duplicate(self, name, n, n_channels):
+
+        m = Module()
+        m.submodules.dut = dut = dsp.Duplicate(n, n_channels=n_channels)
+
+        samples = [[fixed.Const(0.1*(k+1)*(c+1)-0.7, shape=ASQ) for c in range(n_channels)]
+                   for k in range(4)]
+
+        def payload(v):
+            return v[0] if n_channels == 1 else v
+
+        async def stimulus(ctx):
+            for v in samples:
+                await stream.put(ctx, dut.i, payload(v))
+
+        async def testbench(ctx):
+            ctx.set(dut.o.ready, 1)
+            for v in samples:
+                for _ in range(n):
+                    out = await stream.get(ctx, dut.o)
+                    out = [out] if n_channels == 1 else [out[c] for c in range(n_channels)]
+                    self.assertEqual([x.as_float() for x in out],
+                                     [x.as_float() for x in v])
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_process(stimulus)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_duplicate_{name}.vcd", "w")):
+            sim.run()
+
+    def test_whitenoise(self):
+
+        dut = dsp.WhiteNoise()
+
+        width = ASQ.as_shape().width
+
+        def rotl(x, k):
+            return ((x << k) | (x >> (32 - k))) & 0xffffffff
+
+        async def testbench(ctx):
+            # Reference: xoshiro128++
+            s = list(dsp.WhiteNoise.SEEDS)
+            ctx.set(dut.o.ready, 1)
+            for n in range(0, 200):
+                result = (rotl((s[0] + s[3]) & 0xffffffff, 7) + s[0]) & 0xffffffff
+                expected = (result >> (32 - width)) - ((result >> 31) << width)
+                # A new sample must be available every clock.
+                self.assertEqual(ctx.get(dut.o.valid), 1)
+                self.assertEqual(ctx.get(dut.o.payload).as_float(),
+                                 expected / (1 << ASQ.f_bits))
+                t = (s[1] << 9) & 0xffffffff
+                s[2] ^= s[0]
+                s[3] ^= s[1]
+                s[1] ^= s[2]
+                s[0] ^= s[3]
+                s[2] ^= t
+                s[3] = rotl(s[3], 11)
+                await ctx.tick()
+
+        sim = Simulator(dut)
+        sim.add_clock(1e-6)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open("test_whitenoise.vcd", "w")):
+            sim.run()
+
+    @parameterized.expand([
+        ["sz8", 8],
+        ["sz12", 12],
+        ["sz128", 128],
+    ])
+    def test_block_lpf(self, name, sz):
+
+        beta = 0.75
+        dut = dsp.spectral.BlockLPF(ASQ, sz, beta=beta)
+
+        n_blocks = 6
+        samples = [0.9*math.sin(0.7*n) for n in range(sz*n_blocks)]
+
+        async def stimulus(ctx):
+            for n, x in enumerate(samples):
+                await stream.put(ctx, dut.i, {
+                    "first": n % sz == 0,
+                    "sample": fixed.Const(x, shape=ASQ),
+                })
+
+        async def testbench(ctx):
+            y = [0.0]*sz
+            for n, x in enumerate(samples):
+                out = await stream.get(ctx, dut.o)
+                x = fixed.Const(x, shape=ASQ).as_float()
+                y[n % sz] = x + beta*(y[n % sz] - x)
+                self.assertEqual(out.first, n % sz == 0)
+                self.assertAlmostEqual(out.sample.as_float(), y[n % sz], delta=0.001)
+
+        sim = Simulator(dut)
+        sim.add_clock(1e-6)
+        sim.add_process(stimulus)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_block_lpf_{name}.vcd", "w")):
+            sim.run()
+
     def test_boxcar(self):
 
         boxcar = delay_effect.Boxcar(n=32, hpf=True)
@@ -464,3 +937,38 @@ class DSPTests(unittest.TestCase):
         sim.add_testbench(testbench)
         with sim.write_vcd(vcd_file=open("test_stream_arbiter.vcd", "w")):
             sim.run()
+
+    def test_split_merge_lanes(self):
+
+        m = Module()
+        m.submodules.split = split = stream_util.Split(n_channels=4, lanes=2)
+        m.submodules.merge = merge = stream_util.Merge(n_channels=4, lanes=2)
+        for n in range(2):
+            wiring.connect(m, split.o[n], merge.i[n])
+
+        # flat 4-channel streams on either side, remapped to / from lane groups
+        i = stream_util.aosoa_signature(ASQ, 4).flip().create()
+        o = stream_util.aosoa_signature(ASQ, 4).create()
+        stream_util.lanes_remap(m, i, split.i)
+        stream_util.lanes_remap(m, merge.o, o)
+
+        def stimulus_values(n):
+            return [fixed.Const(0.1*(k+1)*(-1)**n, shape=ASQ) for k in range(4)]
+
+        async def stimulus(ctx):
+            for n in range(4):
+                await stream.put(ctx, i, stimulus_values(n))
+
+        async def testbench(ctx):
+            for n in range(4):
+                result = await stream.get(ctx, o)
+                for k in range(4):
+                    self.assertAlmostEqual(result[k].as_float(),
+                                           stimulus_values(n)[k].as_float(), places=4)
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_testbench(stimulus, background=True)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open("test_split_merge_lanes.vcd", "w")):
+            sim.run()